@@ -1,21 +1,30 @@
+import importlib.util
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import itemgetter
 from pathlib import Path
-import xml.etree.ElementTree as ET
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 import UnityPy
-from openpyxl import Workbook, load_workbook
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
 
 from translate_tool import (
     load_patches_from_files,
-    ensure_patch_sheet,
-    populate_patch_sheet_from_file
+    PATCH_SHEETNAME,
+    PATCH_WIDTHS
 )
-from lib.sheet import apply_header_and_column_widths, apply_wrap_to_all_cells
+from lib.sheet import SHEET_WRITER_ENGINES
 
 # Configuration
 OUTPUT_XLSX = "bundle_info.xlsx"
 ADDRESSES_PATH = os.path.join("patches", "addresses.txt")
 IGNORED_BUNDLE_SUFFIXES = ['general-managedtext_assets_all.bundle']
+_IGNORED_SUFFIX_TUPLE = tuple(IGNORED_BUNDLE_SUFFIXES)
 IGNORED_CONTAINERS = ['Assets/#WitchTrials/Data/ScriptableObjects/SpecialThanksData.asset']
 
 # Container lookup configuration
@@ -26,74 +35,79 @@ CONTAINER_LOOKUP_DIR = os.path.join(ROOT, "container_lookup")
 SHEET_NAME = "Bundle Info"
 HEADER = ["Bundle Path Suffix", "Container", "Name", "Type", "PathID", "Original Object Selector", "Original",
           "Chinese Object Selector", "Chinese"]
+COLUMN_WIDTHS = (40, 60, 30, 15, 16, 30, 60, 30, 60)
 
 PATCH_SHEET_NAME = "Patch Addresses"
 PATCH_HEADER = ["Bundle path suffix", "PathID", "Object selector", "Original", "Translated", "Notes"]
 
-def extract_localized_texts(tree, base_path="", bundle_suffix="", parent_stack=None):
-    """Recursively extract localized texts, pairing locale 0 and 2 for the same item index.
-    Additionally, maintain a parent path stack (list) that holds the ancestry while traversing.
-    This can be useful for future context-aware processing. The return format remains unchanged.
+def _join_selector(parts) -> str:
+    """Build an object selector (e.g. a.b[1].c) from a tuple of dict keys (str) and list indices (int)."""
+    out = []
+    for part in parts:
+        if isinstance(part, int):
+            out.append(f"[{part}]")
+        else:
+            out.append(f".{part}" if out else part)
+    return "".join(out)
+
+def extract_localized_texts(tree, bundle_suffix=""):
+    """Extract localized texts, pairing locale 0 and 2 for the same item index.
+    Walks the tree with an explicit stack instead of recursion; each entry keeps its path as a
+    tuple of segments, and results are returned in document order.
     """
-    if parent_stack is None:
-        parent_stack = []
     texts = []
-    if isinstance(tree, dict):
-        for key, value in tree.items():
-            new_path = f"{base_path}.{key}" if base_path else key
-            # push current key into parent stack
-            parent_stack.append(value)
-            if isinstance(value, list) and value:
-                if isinstance(value[0], dict) and "_locale" in value[0] and "_text" in value[0]:
-                    locale_texts = {}
-                    for idx, item in enumerate(value):
-                        selector = f"{new_path}[{idx}]._text"
-                        locale = item.get("_locale")
-                        text = item.get("_text")
-                        locale_texts[locale] = (selector, text)
-                    orig_selector = locale_texts.get(0, ("", ""))[0]
-                    orig_text = locale_texts.get(0, ("", ""))[1]
-                    cn_selector = locale_texts.get(2, ("", ""))[0]
-                    cn_text = locale_texts.get(2, ("", ""))[1]
-                    # If original text is missing, check parent for a _defaultText fallback
-                    if (not orig_text) and cn_text and len(parent_stack) >= 2:
-                        parent_obj = parent_stack[-2]
-                        if isinstance(parent_obj, dict) and "_defaultText" in parent_obj:
-                            orig_text = parent_obj.get("_defaultText")
-                            orig_selector = f"{base_path}._defaultText" if base_path else "_defaultText"
-                    if orig_text or cn_text:
-                        texts.append((orig_selector, orig_text, cn_selector, cn_text))
-                else:
-                    for idx, item in enumerate(value):
-                        item_path = f"{new_path}[{idx}]"
-                        # push index context
-                        parent_stack.append(idx)
-                        texts.extend(extract_localized_texts(item, item_path, bundle_suffix, parent_stack))
-                        parent_stack.pop()
+    # read_typetree only yields plain dicts/lists, so exact type checks are enough
+    _dict = dict
+    _list = list
+    # (node, path parts, dict containing node as a value, dict to look up a _defaultText fallback in)
+    # The fallback dict is the parent, but only when the parent is itself a dict value.
+    stack = [(tree, (), None, None)]
+    while stack:
+        node, path, parent, default_parent = stack.pop()
+        node_type = type(node)
+        if node_type is _dict:
+            child_default = node if parent is not None else None
+            for key, value in reversed(node.items()):
+                stack.append((value, path + (key,), node, child_default))
+        elif node_type is _list and node:
+            first = node[0]
+            if parent is not None and type(first) is _dict and "_locale" in first and "_text" in first:
+                base = _join_selector(path)
+                # Only locales 0 and 2 are kept (last one wins), so only their selectors get built
+                orig_selector = orig_text = cn_selector = cn_text = ""
+                for idx, item in enumerate(node):
+                    locale = item.get("_locale")
+                    if locale == 0:
+                        orig_selector = f"{base}[{idx}]._text"
+                        orig_text = item.get("_text")
+                    elif locale == 2:
+                        cn_selector = f"{base}[{idx}]._text"
+                        cn_text = item.get("_text")
+                # If original text is missing, check parent for a _defaultText fallback
+                if (not orig_text) and cn_text and default_parent is not None and "_defaultText" in default_parent:
+                    orig_text = default_parent.get("_defaultText")
+                    orig_selector = _join_selector(path[:-1] + ("_defaultText",))
+                if orig_text or cn_text:
+                    texts.append((orig_selector, orig_text, cn_selector, cn_text))
             else:
-                texts.extend(extract_localized_texts(value, new_path, bundle_suffix, parent_stack))
-            # pop current key
-            parent_stack.pop()
-    elif isinstance(tree, list):
-        for idx, item in enumerate(tree):
-            new_path = f"{base_path}[{idx}]"
-            parent_stack.append(idx)
-            texts.extend(extract_localized_texts(item, new_path, bundle_suffix, parent_stack))
-            parent_stack.pop()
+                for idx in range(len(node) - 1, -1, -1):
+                    stack.append((node[idx], path + (idx,), None, None))
     return texts
 
-def get_extracted_texts(obj, bundle_suffix=""):
-    """Extract object selectors and texts for original (locale 0) and Chinese (locale 2)."""
-    if obj.type.name == "MonoBehaviour":
-        try:
-            tree = obj.read_typetree()
-            extracted = extract_localized_texts(tree, bundle_suffix=bundle_suffix)
-            if extracted:
-                return extracted
-            # if 'm_text' in tree:
-            #     return [("m_text", tree['m_text'], "m_text", tree['m_text'])]
-        except:
-            return []
+def get_extracted_texts(tree, bundle_suffix=""):
+    """Extract object selectors and texts for original (locale 0) and Chinese (locale 2)
+    from an already read MonoBehaviour typetree.
+    """
+    try:
+        extracted = extract_localized_texts(tree, bundle_suffix=bundle_suffix)
+        if extracted:
+            return extracted
+        # if 'm_text' in tree:
+        #     return [("m_text", tree['m_text'], "m_text", tree['m_text'])]
+    except Exception:
+        # Unexpected tree shapes (e.g. a locale list holding non-dicts) yield no texts;
+        # KeyboardInterrupt/SystemExit still propagate
+        return []
     return []
 
 def _load_container_lookup_map(dir_path: str = CONTAINER_LOOKUP_DIR) -> dict:
@@ -112,31 +126,199 @@ def _load_container_lookup_map(dir_path: str = CONTAINER_LOOKUP_DIR) -> dict:
     if not os.path.isdir(dir_path):
         return mapping
     try:
-        for fname in os.listdir(dir_path):
-            if not fname.lower().endswith('.xml'):
-                continue
-            fpath = os.path.join(dir_path, fname)
+        with os.scandir(dir_path) as entries:
+            xml_paths = [entry.path for entry in entries
+                         if entry.name.lower().endswith('.xml') and entry.is_file()]
+        for fpath in xml_paths:
             try:
-                tree = ET.parse(fpath)
-                root = tree.getroot()
-                for asset in root.findall('./Asset'):
+                # Stream <Asset> elements and drop each one once read, instead of building the whole tree
+                for _, asset in ET.iterparse(fpath, events=('end',)):
+                    if asset.tag != 'Asset':
+                        continue
                     pid_el = asset.find('PathID')
                     cont_el = asset.find('Container')
                     pid = pid_el.text.strip() if pid_el is not None and pid_el.text else None
                     cont = cont_el.text.strip() if cont_el is not None and cont_el.text else None
                     if pid and cont and pid not in mapping:
                         mapping[pid] = cont
+                    asset.clear()
             except Exception as e:
                 print(f"Warning: Failed to parse container lookup file {fpath}: {e}")
     except Exception as e:
         print(f"Warning: Could not read container lookup dir {dir_path}: {e}")
     return mapping
 
-def generate_bundle_info(folder_path: str):
-    """Generate an Excel file with bundle asset information, grouping by container."""
+def _read_workbook_values(xlsx_path: str, skip_sheets=()) -> dict:
+    """Read the cell values of every sheet in an existing workbook, keyed by sheet title in sheet order.
+    Sheets named in skip_sheets keep their place in the order but map to None instead of being read.
+    Returns an empty dict if the file doesn't exist or can't be opened.
+    """
+    if not os.path.exists(xlsx_path):
+        return {}
+    try:
+        # No data_only: formula cells are read as their "=..." text and written back as formulas.
+        # Cached results may be missing (e.g. in files saved by openpyxl), so data_only could blank them
+        wb = load_workbook(xlsx_path, read_only=True)
+    except Exception:
+        return {}
+    try:
+        return {ws.title: None if ws.title in skip_sheets else [list(row) for row in ws.iter_rows(values_only=True)]
+                for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+def _read_column_widths(xlsx_path: str, titles) -> dict:
+    """Read the custom column widths of the given sheets as {title: [width or None by column position]}.
+    Read-only worksheets don't expose column dimensions, so this needs a full load of the workbook
+    and is skipped when there are no titles.
+    """
+    if not titles:
+        return {}
+    try:
+        wb = load_workbook(xlsx_path)
+    except Exception:
+        return {}
+    widths = {}
+    for title in titles:
+        by_col = {}
+        for letter, dim in wb[title].column_dimensions.items():
+            if dim.customWidth:
+                start = dim.min or column_index_from_string(letter)
+                for col in range(start, (dim.max or start) + 1):
+                    by_col[col] = dim.width
+        widths[title] = [by_col.get(col) for col in range(1, max(by_col, default=0) + 1)]
+    return widths
+
+def _cell_text(value) -> str:
+    return str(value).strip() if value is not None else ""
+
+def _fill_if_blank(row: list, col: int, value):
+    """Set row[col] (0-based) to value if it is empty, padding short rows."""
+    if len(row) <= col:
+        row.extend([None] * (col + 1 - len(row)))
+    if _cell_text(row[col]) == "":
+        row[col] = value
+
+def _merge_patch_rows(existing_rows: list, run_rows: list, patches: dict) -> list:
+    """Merge this run's rows and the loaded patch files into the existing Patch addresses rows
+    (header included) without overwriting anything that is already filled in.
+    """
+    headers = [_cell_text(v) for v in existing_rows[0]] if existing_rows else []
+    try:
+        col_original = headers.index("Original")
+        col_translated = headers.index("Translated")
+        col_notes = headers.index("Notes")
+        key_cols = (headers.index("Bundle path suffix"), headers.index("PathID"), headers.index("Object selector"))
+    except ValueError:
+        # Recreate header if missing or mismatched
+        existing_rows = [PATCH_HEADER]
+        col_original, col_translated, col_notes = 3, 4, 5
+        key_cols = (0, 1, 2)
+
+    rows = [list(row) for row in existing_rows]
+    index = {}
+    for r, row in enumerate(rows[1:], start=1):
+        key = tuple(_cell_text(row[c]) if c < len(row) else "" for c in key_cols)
+        if all(key):
+            index[key] = r
+
+    # Add/merge rows from this run; fill Original/Notes if empty, leave Translated to user/patch
+    for suf, pid, sel, original, translated, notes in run_rows:
+        key = (str(suf).strip(), str(pid).strip(), str(sel).strip())
+        if not all(key):
+            continue
+        r = index.get(key)
+        if r is None:
+            rows.append([*key, original, translated, notes])
+            index[key] = len(rows) - 1
+        else:
+            _fill_if_blank(rows[r], col_original, original)
+            _fill_if_blank(rows[r], col_notes, notes)
+
+    # Append any missing data from the patch files, only filling blanks in existing rows
+    has_rows = len(rows) > 1
+    for bundle_suffix, id_map in patches.items():
+        for path_id, entries in id_map.items():
+            pid_str = str(path_id)
+            for ent in entries:
+                selector = ent.get('object_selector', '')
+                val = ent.get('patched_value', '')
+                if not has_rows:
+                    rows.append([bundle_suffix, pid_str, selector, val, "", ""])
+                    continue
+                r = index.get((bundle_suffix, pid_str, selector))
+                if r is None:
+                    rows.append([bundle_suffix, pid_str, selector, val, ""])
+                else:
+                    _fill_if_blank(rows[r], col_original, val)
+                    _fill_if_blank(rows[r], col_translated, val)
+
+    # Keep PathID (column B) values as plain strings
+    for row in rows[1:]:
+        if len(row) > 1 and row[1] is not None:
+            row[1] = str(row[1]).strip()
+    return rows
+
+def _build_notes(notes_head: str, original) -> str:
+    """Notes text: the Name/Container lines, then the Original value (with line break after ':') if it exists."""
+    if not original:
+        return notes_head
+    return f"{notes_head}\nOriginal value:\n{original}" if notes_head else f"Original value:\n{original}"
+
+def _process_bundle(bundle_path: Path, bundle_suffix: str, id_map: dict, container_map: dict) -> list:
+    """Collect the asset rows of one bundle: extracted localized texts plus entries from the
+    bundle's patches (id_map: path_id -> patch entries). Runs in a worker process.
+    Each row is a tuple in HEADER column order without the bundle suffix, followed by the
+    Notes text for the Patch addresses sheet; the container is "" when unknown.
+    """
+    assets = []
+    try:
+        bundle = UnityPy.load(str(bundle_path))
+
+        for obj in bundle.objects:
+            type_name = obj.type.name
+            if type_name != "MonoBehaviour":
+                continue
+
+            # obj.container is an indexed lookup in UnityPy; only fall back to the XML map when unset
+            pid_str = str(obj.path_id)
+            resolved_container = obj.container or container_map.get(pid_str)
+            if resolved_container in IGNORED_CONTAINERS:
+                continue
+
+            # Reading the typetree is the expensive part; do it once for both the name and the texts
+            tree = obj.read_typetree()
+            name = tree['m_Name']
+
+            extracted = get_extracted_texts(tree, bundle_suffix)
+            container = resolved_container or ""
+            # Name and Container lines of the Notes are the same for every row of this object
+            notes_head = "\n".join(line for line in (f"Name: {name}" if name else "",
+                                                      f"Container: {container}" if container else "") if line)
+
+            for orig_selector, original, cn_selector, chinese in extracted:
+                assets.append((container, name, type_name, pid_str, orig_selector, original, cn_selector, chinese,
+                               _build_notes(notes_head, original)))
+
+            for entry in id_map.get(pid_str, []):
+                selector = entry.get('object_selector', '')
+                if selector:
+                    patched_value = entry.get('patched_value', '')
+                    assets.append((container, name, type_name, pid_str, selector, patched_value, selector, patched_value,
+                                   _build_notes(notes_head, patched_value)))
+
+        print(f"Processed {bundle_path}")
+
+    except Exception as e:
+        print(f"Error processing {bundle_path}: {e}")
+    return assets
+
+def generate_bundle_info(folder_path: str, engine: str = "openpyxl"):
+    """Generate an Excel file with bundle asset information, grouping by container.
+    engine selects the xlsx writer: "openpyxl" (write-only mode) or "xlsxwriter" (constant_memory mode).
+    """
     folder = Path(folder_path)
-    bundle_paths = [p for p in folder.rglob("*.bundle") if
-                    not any(str(p).endswith(suf) for suf in IGNORED_BUNDLE_SUFFIXES)]
+    bundle_paths = [p for p in folder.rglob("*.bundle") if not p.name.endswith(_IGNORED_SUFFIX_TUPLE)]
 
     if not bundle_paths:
         print(f"No .bundle files found in {folder_path}")
@@ -148,187 +330,63 @@ def generate_bundle_info(folder_path: str):
     # Load container lookup map (optional)
     container_map = _load_container_lookup_map()
 
-    # Create or load Excel workbook (avoid overwriting existing file)
-    if os.path.exists(OUTPUT_XLSX):
-        try:
-            wb = load_workbook(OUTPUT_XLSX)
-        except Exception:
-            wb = Workbook()
-    else:
-        wb = Workbook()
-
-    # Ensure/Create main info sheet
-    if SHEET_NAME in wb.sheetnames:
-        ws = wb[SHEET_NAME]
-        # Clear existing data rows, keep header if present
-        if ws.max_row and ws.max_row > 1:
-            ws.delete_rows(2, ws.max_row - 1)
-        # Ensure header exists and widths applied
-        if (ws.cell(row=1, column=1).value or "").strip() != HEADER[0]:
-            ws.delete_rows(1, ws.max_row)
-            ws.append(HEADER)
-            apply_header_and_column_widths(ws, HEADER, [40, 60, 30, 15, 16, 30, 60, 30, 60])
-        else:
-            apply_header_and_column_widths(ws, HEADER, [40, 60, 30, 15, 16, 30, 60, 30, 60])
-    else:
-        ws = wb.create_sheet(title=SHEET_NAME)
-        ws.append(HEADER)
-        apply_header_and_column_widths(ws, HEADER, [40, 60, 30, 15, 16, 30, 60, 30, 60])
-
-    # Collect all asset data grouped by bundle
+    # Keep the existing file's data (avoid overwriting it): the Bundle Info sheet is regenerated,
+    # the Patch addresses sheet is merged and any other sheet is carried over with its values and
+    # column widths only (fonts, fills, comments, validation and conditional formatting are dropped).
+    # Sheets keep their order; missing Bundle Info / Patch addresses sheets are added at the end.
+    existing_sheets = _read_workbook_values(OUTPUT_XLSX, skip_sheets=(SHEET_NAME,))
+    sheet_order = list(existing_sheets) + [t for t in (SHEET_NAME, PATCH_SHEETNAME) if t not in existing_sheets]
+    other_widths = _read_column_widths(OUTPUT_XLSX, [t for t in existing_sheets
+                                                     if t not in (SHEET_NAME, PATCH_SHEETNAME)])
+
+    # Collect all asset data grouped by bundle. Bundles are independent and CPU-bound to parse,
+    # so they are processed in worker processes; the workbook is only written in this process.
+    bundle_suffixes = [str(p.relative_to(folder)) for p in bundle_paths]
     bundle_data = {}
-    for bundle_path in bundle_paths:
-        bundle_suffix = str(bundle_path.relative_to(folder))
-        bundle_data[bundle_suffix] = []
-
-        try:
-            bundle = UnityPy.load(str(bundle_path))
-
-            for obj in bundle.objects:
-                if obj.type.name not in ["MonoBehaviour"]:
-                    continue
-
-                resolved_container = obj.container or container_map.get(str(obj.path_id))
-                if resolved_container in IGNORED_CONTAINERS:
-                    continue
-
-                name = obj.read_typetree()['m_Name']
-
-                extracted = get_extracted_texts(obj, bundle_suffix)
-                for orig_selector, original, cn_selector, chinese in extracted:
-                    bundle_data[bundle_suffix].append({
-                        "container": resolved_container,
-                        "name": name,
-                        "type": obj.type.name,
-                        "path_id": str(obj.path_id),
-                        "original_selector": orig_selector,
-                        "original": original,
-                        "chinese_selector": cn_selector,
-                        "chinese": chinese,
-                    })
-
-                if obj.type.name == "MonoBehaviour" and bundle_suffix in patches:
-                    id_map = patches.get(bundle_suffix, {})
-                    pid_str = str(obj.path_id)
-                    if pid_str in id_map:
-                        for entry in id_map[pid_str]:
-                            selector = entry.get('object_selector', '')
-                            if selector:
-                                patched_entry = {
-                                    "container": resolved_container,
-                                    "name": name,
-                                    "type": obj.type.name,
-                                    "path_id": pid_str,
-                                    "original_selector": selector,
-                                    "original": entry.get('patched_value', ''),
-                                    "chinese_selector": selector,
-                                    "chinese": entry.get('patched_value', ''),
-                                }
-                                bundle_data[bundle_suffix].append(patched_entry)
-
-            print(f"Processed {bundle_path}")
-
-        except Exception as e:
-            print(f"Error processing {bundle_path}: {e}")
-
-    # Write to Excel, including all fields for every row
+    max_workers = min(len(bundle_paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(_process_bundle, bundle_paths, bundle_suffixes,
+                               [patches.get(suf, {}) for suf in bundle_suffixes], repeat(container_map))
+        for bundle_suffix, assets in zip(bundle_suffixes, results):
+            bundle_data[bundle_suffix] = assets
+
+    # Build the Bundle Info rows, including all fields for every row
+    info_rows = []
     all_rows_for_patch = []
     for bundle_suffix in sorted(bundle_data.keys()):
         assets = bundle_data[bundle_suffix]
         if not assets:
             continue
 
-        sorted_assets = sorted(assets, key=lambda x: (x["container"] or "", x["name"], x["type"], x["path_id"]))
-
-        for asset in sorted_assets:
-            ws.append([
-                bundle_suffix,
-                asset["container"],
-                asset["name"],
-                asset["type"],
-                asset["path_id"],
-                asset["original_selector"],
-                asset["original"],
-                asset["chinese_selector"],
-                asset["chinese"]
-            ])
-
-            # Build Notes: Name, Container, and Original value (with line break after ':') if they exist
-            notes_lines = []
-            if asset.get("name"):
-                notes_lines.append(f"Name: {asset['name']}")
-            if asset.get("container"):
-                notes_lines.append(f"Container: {asset['container']}")
-            if asset.get("original"):
-                notes_lines.append("Original value:\n" + str(asset["original"]))
-            notes_text = "\n".join(notes_lines)
-
-            all_rows_for_patch.append([
-                bundle_suffix,
-                asset["path_id"],
-                asset["chinese_selector"],
-                asset["chinese"],
-                asset.get("translated", ""),
-                notes_text
-            ])
-
-    apply_wrap_to_all_cells(ws)
-
-    # Merge into Patch Addresses sheet without overwriting existing data
-    ws_patch = ensure_patch_sheet(wb)
-    # Map headers and build index
-    headers = [(ws_patch.cell(row=1, column=c).value or "").strip() for c in range(1, ws_patch.max_column + 1)]
-    try:
-        col_suffix = headers.index("Bundle path suffix") + 1
-        col_pathid = headers.index("PathID") + 1
-        col_selector = headers.index("Object selector") + 1
-        col_original = headers.index("Original") + 1
-        col_translated = headers.index("Translated") + 1
-        col_notes = headers.index("Notes") + 1
-    except ValueError:
-        # Recreate header if mismatched
-        ws_patch.delete_rows(1, ws_patch.max_row)
-        ws_patch.append(PATCH_HEADER)
-        apply_header_and_column_widths(ws_patch, PATCH_HEADER, [40, 16, 40, 60, 60, 60])
-        col_suffix, col_pathid, col_selector, col_original, col_translated, col_notes = 1, 2, 3, 4, 5, 6
-
-    index = {}
-    for r in range(2, ws_patch.max_row + 1):
-        suf = (ws_patch.cell(row=r, column=col_suffix).value or "").strip()
-        pid = str((ws_patch.cell(row=r, column=col_pathid).value or "").strip())
-        sel = (ws_patch.cell(row=r, column=col_selector).value or "").strip()
-        if suf and pid and sel:
-            index[(suf, pid, sel)] = r
-
-    # Add/merge rows from this run
-    for row in all_rows_for_patch:
-        suf, pid, sel, original, translated, notes = row
-        key = (str(suf).strip(), str(pid).strip(), str(sel).strip())
-        if not key[0] or not key[1] or not key[2]:
-            continue
-        r = index.get(key)
-        if r is None:
-            ws_patch.append([key[0], key[1], key[2], original, translated, notes])
-            index[key] = ws_patch.max_row
+        # Sort by (container, name, type, path_id)
+        sorted_assets = sorted(assets, key=itemgetter(0, 1, 2, 3))
+
+        for container, name, type_name, path_id, orig_selector, original, cn_selector, chinese, notes in sorted_assets:
+            info_rows.append([bundle_suffix, container, name, type_name, path_id, orig_selector, original,
+                              cn_selector, chinese])
+            all_rows_for_patch.append([bundle_suffix, path_id, cn_selector, chinese, "", notes])
+
+    # Merge into Patch addresses sheet without overwriting existing data
+    patch_rows = _merge_patch_rows(existing_sheets.get(PATCH_SHEETNAME) or [], all_rows_for_patch, patches)
+
+    # Stream rows into the workbook writer, one sheet at a time in the original order;
+    # every cell of the Bundle Info and Patch addresses sheets is wrapped as it is written
+    writer = SHEET_WRITER_ENGINES[engine](OUTPUT_XLSX)
+    for title in sheet_order:
+        if title == SHEET_NAME:
+            ws, rows = writer.add_sheet(SHEET_NAME, HEADER, COLUMN_WIDTHS), info_rows
+        elif title == PATCH_SHEETNAME:
+            ws, rows = writer.add_sheet(PATCH_SHEETNAME, patch_rows[0], PATCH_WIDTHS, text_columns=(2,)), patch_rows[1:]
         else:
-            # Fill Original/Notes if empty; leave Translated to user/patch
-            o_cell = ws_patch.cell(row=r, column=col_original)
-            if (o_cell.value is None) or (str(o_cell.value).strip() == ""):
-                o_cell.value = original
-            n_cell = ws_patch.cell(row=r, column=col_notes)
-            if (n_cell.value is None) or (str(n_cell.value).strip() == ""):
-                n_cell.value = notes
-
-    # Now append any missing data from files without overwriting existing rows
-    populate_patch_sheet_from_file(wb, update_instead_of_overwrite=True)
-
-    apply_wrap_to_all_cells(ws_patch)
+            ws, rows = writer.add_sheet(title, column_widths=other_widths.get(title)), existing_sheets[title]
+        for row in rows:
+            writer.append(ws, row)
 
-    wb.save(OUTPUT_XLSX)
+    writer.close()
     print(f"Saved bundle information to {OUTPUT_XLSX}")
 
 def main():
-    command_usage = "python bundle_info.py [info <folder>]"
+    command_usage = "python bundle_info.py [info <folder> [--engine openpyxl|xlsxwriter]]"
     if len(sys.argv) < 3:
         print(f"Usage: {command_usage}")
         sys.exit(1)
@@ -340,8 +398,22 @@ def main():
         print(f"Error: {folder_path} is not a valid directory")
         sys.exit(1)
 
+    engine = "openpyxl"
+    if len(sys.argv) >= 5 and sys.argv[3] == '--engine':
+        engine = sys.argv[4].lower()
+    elif len(sys.argv) > 3:
+        print(f"Unknown arguments. Use {command_usage}.")
+        sys.exit(1)
+    if engine not in SHEET_WRITER_ENGINES:
+        print(f"Unknown engine '{engine}'. Use {command_usage}.")
+        sys.exit(1)
+    # xlsxwriter is optional; check it before spending time on the bundles
+    if engine == "xlsxwriter" and importlib.util.find_spec("xlsxwriter") is None:
+        print("xlsxwriter is required for this engine. Please install it with: pip install xlsxwriter")
+        sys.exit(1)
+
     if cmd == 'info':
-        generate_bundle_info(folder_path)
+        generate_bundle_info(folder_path, engine)
     else:
         print(f"Unknown command. Use {command_usage}.")
         sys.exit(1)
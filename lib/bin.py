@@ -1,9 +1,11 @@
 import sys
 
+_HEX_SEPARATORS = str.maketrans("", "", " _")
+
 
 def _normalize_hex_to_bytes(hex_str: str) -> bytes:
     """Convert a hex string to bytes, ignoring spaces and underscores."""
-    cleaned = hex_str.replace(" ", "").replace("_", "").strip()
+    cleaned = hex_str.translate(_HEX_SEPARATORS).strip()
     return bytes.fromhex(cleaned)
 
 
@@ -1,11 +1,19 @@
+import os
 from typing import Optional
 
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 
 
 SHEETNAME_MAXLEN = 31
 
+# Shared style objects, assigned to cells as they are written
+HEADER_FONT = Font(bold=True)
+HEADER_FILL = PatternFill("solid", fgColor="FFDDDDDD")
+WRAP_ALIGN = Alignment(vertical="top", wrap_text=True)
+
 def sanitize_sheet_name(name: str) -> str:
     # Excel sheet name restrictions
     invalid = set('[]:*?/\\')
@@ -19,13 +27,11 @@ def apply_frozen_header(ws, headers, freeze_panes_cell: Optional[str] = "A2"):
     """Apply bold + gray header styling to row 1 across the given number of headers
     and optionally freeze panes at the specified cell (default A2).
     """
-    header_font = Font(bold=True)
-    fill = PatternFill("solid", fgColor="DDDDDD")
     for col_idx, _ in enumerate(headers, start=1):
         cell = ws.cell(row=1, column=col_idx)
-        cell.font = header_font
-        cell.fill = fill
-        cell.alignment = Alignment(vertical="top", wrap_text=True)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        cell.alignment = WRAP_ALIGN
     if freeze_panes_cell:
         ws.freeze_panes = freeze_panes_cell
 
@@ -41,6 +47,11 @@ def apply_header_and_column_widths(ws, headers, column_widths=None, freeze_panes
     apply_frozen_header(ws, headers, freeze_panes_cell)
 
     # Apply column widths, if provided
+    apply_column_widths(ws, column_widths)
+
+
+def apply_column_widths(ws, column_widths=None):
+    """Set column widths from a list/tuple (by position) or a dict keyed by column letter."""
     if column_widths:
         if isinstance(column_widths, (list, tuple)):
             for idx, width in enumerate(column_widths, start=1):
@@ -59,12 +70,145 @@ def apply_header_and_column_widths(ws, headers, column_widths=None, freeze_panes
                     pass
 
 
-def apply_wrap_to_all_cells(ws):
-    """Ensure wrap_text and top vertical alignment on all cells in the worksheet."""
-    max_row = ws.max_row or 1
-    max_col = ws.max_column or 1
-    for row in ws.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=max_col):
-        for cell in row:
-            # Preserve existing horizontal alignment if set
-            horiz = getattr(cell.alignment, 'horizontal', None) if cell.alignment else None
-            cell.alignment = Alignment(wrap_text=True, vertical="top", horizontal=horiz)
+def wrapped_cells(ws, values, header: bool = False, text_columns=()):
+    """Wrap a row of values into cells with wrap_text and top vertical alignment, ready for ws.append.
+    Works for both regular and write-only worksheets.
+    - header: also apply the bold + gray header style
+    - text_columns: 1-based column indexes to store with the plain text ("@") number format
+    """
+    cells = []
+    for col_idx, value in enumerate(values, start=1):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.alignment = WRAP_ALIGN
+        if header:
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+        if col_idx in text_columns:
+            cell.number_format = "@"
+        cells.append(cell)
+    return cells
+
+
+def start_write_only_sheet(ws, headers, column_widths=None, freeze_panes_cell: Optional[str] = "A2",
+                           text_columns=()):
+    """Write-only counterpart of apply_header_and_column_widths.
+    Column widths and frozen panes must be set before the first row is appended,
+    so this sets them up and then writes the styled header row.
+    """
+    apply_column_widths(ws, column_widths)
+    if freeze_panes_cell:
+        ws.freeze_panes = freeze_panes_cell
+    ws.append(wrapped_cells(ws, headers, header=True, text_columns=text_columns))
+
+
+def _temp_path(path: str) -> str:
+    return f"{path}.tmp"
+
+
+def _save_via_temp(path: str, save) -> None:
+    """Call save(tmp_path) to write the workbook next to path, then move it over path. An existing
+    file at path is only replaced once the new one is complete; on failure the temp file is removed.
+    """
+    tmp_path = _temp_path(path)
+    try:
+        save(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class OpenpyxlSheetWriter:
+    """Stream rows into an openpyxl write-only workbook, saved to `path` on close()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self._text_columns = {}
+
+    def add_sheet(self, title: str, headers=None, column_widths=None, text_columns=()):
+        """Create a sheet and return its handle. With headers, the sheet gets a styled frozen
+        header and wrapped cells; without, rows are written as plain values. Column widths apply either way.
+        """
+        ws = self.wb.create_sheet(title=title)
+        if headers is None:
+            apply_column_widths(ws, column_widths)
+        else:
+            start_write_only_sheet(ws, headers, column_widths, text_columns=text_columns)
+            self._text_columns[ws.title] = text_columns
+        return ws
+
+    def append(self, ws, values):
+        if ws.title in self._text_columns:
+            ws.append(wrapped_cells(ws, values, text_columns=self._text_columns[ws.title]))
+        else:
+            ws.append(values)
+
+    def close(self):
+        _save_via_temp(self.path, self.wb.save)
+
+
+class XlsxWriterSheetWriter:
+    """Stream rows through xlsxwriter in constant_memory mode, where each row is flushed to disk
+    once the next one is written. Rows must therefore be appended once, in final order.
+    """
+
+    def __init__(self, path: str):
+        try:
+            import xlsxwriter
+        except ImportError as e:
+            raise ImportError("xlsxwriter is required for this engine. "
+                              "Please install it with: pip install xlsxwriter") from e
+        # Rows are written to a temp file and only moved over path by close()
+        self.path = path
+        self.wb = xlsxwriter.Workbook(_temp_path(path), {'constant_memory': True})
+        header = {'bold': True, 'bg_color': '#DDDDDD', 'text_wrap': True, 'valign': 'top'}
+        wrap = {'text_wrap': True, 'valign': 'top'}
+        self.header_formats = (self.wb.add_format(header), self.wb.add_format({**header, 'num_format': '@'}))
+        self.wrap_formats = (self.wb.add_format(wrap), self.wb.add_format({**wrap, 'num_format': '@'}))
+        self._next_row = {}
+        self._formats = {}
+
+    def add_sheet(self, title: str, headers=None, column_widths=None, text_columns=()):
+        """Same contract as OpenpyxlSheetWriter.add_sheet."""
+        ws = self.wb.add_worksheet(title)
+        self._next_row[ws.name] = 0
+        for idx, width in enumerate(column_widths or []):
+            if width is not None:
+                ws.set_column(idx, idx, width)
+        if headers is not None:
+            ws.freeze_panes(1, 0)
+            self._write(ws, headers, self.header_formats, text_columns)
+            self._formats[ws.name] = (self.wrap_formats, text_columns)
+        return ws
+
+    def _write(self, ws, values, formats=(None, None), text_columns=()):
+        """Write one row; formats is (default format, plain text format for text_columns)."""
+        row = self._next_row[ws.name]
+        for col_idx, value in enumerate(values, start=1):
+            fmt = formats[1] if col_idx in text_columns else formats[0]
+            if value is None or value == "":
+                # Empty strings are left blank, as openpyxl does
+                if fmt is not None:
+                    ws.write_blank(row, col_idx - 1, None, fmt)
+            elif isinstance(value, str) and len(value) > 1 and value.startswith("="):
+                # Formulas, as openpyxl treats them
+                ws.write_formula(row, col_idx - 1, value, fmt)
+            elif isinstance(value, str):
+                ws.write_string(row, col_idx - 1, value, fmt)
+            else:
+                ws.write(row, col_idx - 1, value, fmt)
+        self._next_row[ws.name] = row + 1
+
+    def append(self, ws, values):
+        self._write(ws, values, *self._formats.get(ws.name, ()))
+
+    def close(self):
+        _save_via_temp(self.path, lambda tmp_path: self.wb.close())
+
+
+SHEET_WRITER_ENGINES = {
+    "openpyxl": OpenpyxlSheetWriter,
+    "xlsxwriter": XlsxWriterSheetWriter,
+}
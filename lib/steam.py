@@ -1,8 +1,11 @@
 import os
 import winreg
+from functools import lru_cache
 import vdf
 
 
+# Registry and libraryfolders.vdf don't change while the tool runs, so both lookups are cached
+@lru_cache(maxsize=1)
 def get_steam_install_path():
     """Retrieves the Steam installation path from the Windows Registry."""
     try:
@@ -22,8 +25,11 @@ def get_steam_install_path():
             return None
 
 
+@lru_cache(maxsize=1)
 def get_steam_library_paths():
-    """Finds all Steam library paths, including the main install and additional folders."""
+    """Finds all Steam library paths, including the main install and additional folders.
+    Returned as a tuple since the result is cached and shared between callers.
+    """
     library_paths = []
     steam_install_path = get_steam_install_path()
 
@@ -43,7 +49,7 @@ def get_steam_library_paths():
             except Exception as e:
                 print(f"Error parsing libraryfolders.vdf: {e}")
 
-    return [os.path.normpath(path) for path in library_paths]
+    return tuple(os.path.normpath(path) for path in library_paths)
 
 def get_steam_game_path(path_after_common):
     """Finds the full path to a game within Steam's library folders."""
@@ -1,20 +1,15 @@
-import re
-
-
 def is_alnum_start(s: str) -> bool:
-    s = s.lstrip()
-    return bool(re.match(r"^\w", s))
+    # First non-whitespace char is a word char (same set as the regex \w), without copying s
+    for ch in s:
+        if ch.isspace():
+            continue
+        return ch.isalnum() or ch == '_'
+    return False
 
 
 def trim_blank_lines(text: str) -> str:
     # Normalize newlines, trim leading/trailing blank lines
     lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
-    # Strip trailing spaces on each line but preserve internal blank lines
-    lines = [ln.rstrip() for ln in lines]
-    # Remove leading blank lines
-    while lines and lines[0].strip() == "":
-        lines.pop(0)
-    # Remove trailing blank lines
-    while lines and lines[-1].strip() == "":
-        lines.pop()
-    return "\n".join(lines)
+    # Strip trailing spaces on each line but preserve internal blank lines.
+    # Blank lines are then empty, so leading/trailing ones are just the outer newlines of the join
+    return "\n".join([ln.rstrip() for ln in lines]).strip("\n")
@@ -1,23 +1,42 @@
 import re
+from functools import lru_cache
 
+_PART_RE = re.compile(r"^(\w+)((\[\d+])*)$")
+_INDEX_RE = re.compile(r"\[(\d+)]")
 
+
+@lru_cache(maxsize=4096)
 def _parse_selector(selector: str):
     # Support consecutive indices, e.g., a[1][2].b[3]
+    # Results are cached as immutable tuples, so a repeated selector is only parsed once.
     parts = selector.split('.') if selector else []
-    tokens = []  # list of (name: str, indices: List[int])
+    tokens = []  # list of (name: str, indices: Tuple[int, ...])
     for part in parts:
-        m = re.match(r"^(\w+)((\[\d+])*)$", part)
+        m = _PART_RE.match(part)
         if not m:
-            tokens.append((part, []))
+            tokens.append((part, ()))
         else:
             name = m.group(1)
             idxs_str = m.group(2) or ""
-            idxs = [int(mm.group(1)) for mm in re.finditer(r"\[(\d+)]", idxs_str)]
+            idxs = tuple(map(int, _INDEX_RE.findall(idxs_str)))
             tokens.append((name, idxs))
-    return tokens
+    return tuple(tokens)
 
 
 def set_by_selector(root, selector: str, value):
+    # Fast path: plain dotted selectors (no indices) only walk dict keys
+    if selector and '[' not in selector:
+        *names, last = selector.split('.')
+        cur = root
+        for name in names:
+            if not isinstance(cur, dict) or name not in cur:
+                return False
+            cur = cur[name]
+        if not isinstance(cur, dict) or last not in cur:
+            return False
+        cur[last] = value
+        return True
+
     tokens = _parse_selector(selector)
     if not tokens:
         return False
@@ -1,9 +1,13 @@
+import numpy as np
 import pandas as pd
 import os
 import argparse
-import json
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
-from openpyxl import load_workbook, Workbook
+from io import StringIO
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 
@@ -33,6 +37,13 @@ TRANS_COMMON_HEADER = ["ID", "Original", "Chinese", "MTL", "Edited", "QA 1", "QA
 TRANS_COL_WIDTHS = [32, 60, 60, 60, 60, 14, 14, 14]
 TRANS_SYSTEM_SHEETS = ["Metadata", "Overview", "Knowledge base", "Summaries", "Patch addresses"]
 
+# --- Style Config (shared, created once) ---
+HEADER_FONT = Font(bold=True)
+HEADER_FILL = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+HEADER_ALIGN = Alignment(horizontal='center', vertical='center')
+WRAP_ALIGN = Alignment(wrap_text=True, vertical='top')
+WRAP_LEFT_ALIGN = Alignment(horizontal='left', vertical='top', wrap_text=True)
+
 
 # ==========================================
 # CÁC HÀM HỖ TRỢ (HELPER FUNCTIONS)
@@ -49,12 +60,43 @@ def clean_note_content(note_text):
     return "\n".join(clean_lines).strip()
 
 
-def format_bundle_excel(file_path):
-    """Định dạng chuẩn cho file Bundle Info"""
+def _blank_column(df):
+    """Cột rỗng ('') cùng index với df, dùng khi sheet thiếu cột"""
+    return pd.Series("", index=df.index, dtype=object)
+
+
+def _str_column(df, col, strip=True):
+    """str(giá trị) cho cả cột (NaN -> 'nan', giống str() trên từng dòng), mặc định có strip"""
+    if col not in df.columns:
+        return _blank_column(df)
+    values = df[col].map(str)
+    return values.str.strip() if strip else values
+
+
+def _index_last(key_columns, values):
+    """Đánh index values theo khóa ghép từ key_columns; khóa trùng thì dòng sau thắng (như dict)"""
+    values = values.set_axis(pd.MultiIndex.from_arrays(key_columns))
+    return values[~values.index.duplicated(keep='last')]
+
+
+def _text_or_blank(col):
+    """str(giá trị) cho cả cột, ô trống (NaN) -> ''"""
+    return col.map(str).where(col.notna(), "").to_numpy(dtype=object)
+
+
+def clean_note_column(notes):
+    """clean_note_content cho cả cột; ô không có tag ']:' chỉ cần strip nên xử lý theo cột"""
+    tagged = notes.str.contains(']:', regex=False).to_numpy()
+    cleaned = notes.str.strip()
+    if tagged.any():
+        cleaned[tagged] = notes[tagged].map(clean_note_content)
+    return cleaned
+
+
+def format_bundle_excel(wb):
+    """Định dạng chuẩn cho file Bundle Info (workbook đang ghi, trước khi lưu)"""
     print("    [-] Đang định dạng file Bundle Info...")
     try:
-        wb = load_workbook(file_path)
-
         ws = None
         for s in wb.sheetnames:
             if s.lower() == "patch addresses": ws = wb[s]
@@ -64,33 +106,30 @@ def format_bundle_excel(file_path):
                 col_letter = get_column_letter(col_idx)
                 ws.column_dimensions[col_letter].width = width
                 cell = ws.cell(row=1, column=col_idx)
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+                cell.font = HEADER_FONT
+                cell.alignment = HEADER_ALIGN
+                cell.fill = HEADER_FILL
             for row in range(2, ws.max_row + 1):
                 ws.cell(row=row, column=2).number_format = '@'
             for row in ws.iter_rows(min_row=2):
                 for cell in row:
-                    cell.alignment = Alignment(wrap_text=True, vertical='top')
+                    cell.alignment = WRAP_ALIGN
 
         if "Bundle Info" in wb.sheetnames:
             ws = wb["Bundle Info"]
             for col_idx, width in enumerate(BUNDLE_INFO_WIDTHS, 1):
                 ws.column_dimensions[get_column_letter(col_idx)].width = width
                 cell = ws.cell(row=1, column=col_idx)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-
-        wb.save(file_path)
+                cell.font = HEADER_FONT
+                cell.fill = HEADER_FILL
     except Exception as e:
         print(f"    [!] Lỗi định dạng Bundle: {e}")
 
 
-def format_translate_excel(file_path):
-    """Định dạng chuẩn cho file Translate"""
+def format_translate_excel(wb):
+    """Định dạng chuẩn cho file Translate (workbook đang ghi, trước khi lưu)"""
     print("    [-] Đang định dạng file Translate...")
     try:
-        wb = load_workbook(file_path)
         for ws in wb.worksheets:
             if ws.title in TRANS_SYSTEM_SHEETS: continue
 
@@ -99,19 +138,16 @@ def format_translate_excel(file_path):
                 ws.column_dimensions[col_letter].width = width
 
             for cell in ws[1]:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+                cell.font = HEADER_FONT
+                cell.alignment = HEADER_ALIGN
+                cell.fill = HEADER_FILL
 
             max_row = ws.max_row
             max_col = ws.max_column
             if max_row > 1:
                 for row in ws.iter_rows(min_row=2, max_row=max_row, max_col=max_col):
                     for cell in row:
-                        cell.alignment = Alignment(wrap_text=True, vertical='top')
-                        if cell.column == 1:
-                            cell.alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
-        wb.save(file_path)
+                        cell.alignment = WRAP_LEFT_ALIGN if cell.column == 1 else WRAP_ALIGN
     except Exception as e:
         print(f"    [!] Lỗi định dạng Translate: {e}")
 
@@ -120,10 +156,16 @@ def format_translate_excel(file_path):
 # REPORTING
 # ==========================================
 
+SEPARATOR = "-" * 30
+
+
 def write_bundle_report(report_path, logs, stats):
     print(f"    [-] Đang xuất báo cáo Bundle: {report_path}")
-    changed_logs = [l for l in logs if l['status'] == 'CONTENT_CHANGED']
-    new_logs = [l for l in logs if l['status'] == 'NEW_UNMATCHED']
+    changed = logs['status'] == 'CONTENT_CHANGED'
+    new = logs['status'] == 'NEW_UNMATCHED'
+    changed_logs = list(zip(logs['path_id'][changed], logs['bundle'][changed],
+                            logs['original_old'][changed], logs['original_new'][changed]))
+    new_logs = list(zip(logs['path_id'][new], logs['bundle'][new], logs['original_new'][new]))
 
     with open(report_path, 'w', encoding='utf-8') as f:
         f.write("=== BUNDLE INFO MERGE REPORT ===\n")
@@ -137,18 +179,20 @@ def write_bundle_report(report_path, logs, stats):
 
         if changed_logs:
             f.write(">>> DANH SÁCH THAY ĐỔI TEXT GỐC <<<\n\n")
-            for item in changed_logs:
-                f.write(f"[ID]: {item['path_id']} ({item['bundle']})\n")
-                f.write(f"  Cũ: {item['original_old']}\n")
-                f.write(f"  Mới: {item['original_new']}\n")
-                f.write("-" * 30 + "\n")
+            f.write("".join(
+                f"[ID]: {path_id} ({bundle})\n"
+                f"  Cũ: {original_old}\n"
+                f"  Mới: {original_new}\n"
+                f"{SEPARATOR}\n"
+                for path_id, bundle, original_old, original_new in changed_logs))
             f.write("\n")
 
         if new_logs:
             f.write(">>> DANH SÁCH DÒNG MỚI <<<\n\n")
-            for item in new_logs:
-                f.write(f"[ID]: {item['path_id']} ({item['bundle']})\n")
-                f.write(f"  Gốc: {item['original_new']}\n")
+            f.write("".join(
+                f"[ID]: {path_id} ({bundle})\n"
+                f"  Gốc: {original_new}\n"
+                for path_id, bundle, original_new in new_logs))
 
 
 def write_translate_report(report_path, logs):
@@ -162,12 +206,13 @@ def write_translate_report(report_path, logs):
             f.write("Không phát hiện thay đổi nào trong Text gốc.\n")
         else:
             f.write(f"Tìm thấy {len(logs)} thay đổi trong Text gốc.\n\n")
-            for item in logs:
-                f.write(f"[Sheet]: {item['sheet']} | [ID]: {item['id']}\n")
-                f.write(f"  Cột: {item['field']}\n")
-                f.write(f"  Cũ: {item['old']}\n")
-                f.write(f"  Mới: {item['new']}\n")
-                f.write("-" * 30 + "\n")
+            f.write("".join(
+                f"[Sheet]: {item['sheet']} | [ID]: {item['id']}\n"
+                f"  Cột: {item['field']}\n"
+                f"  Cũ: {item['old']}\n"
+                f"  Mới: {item['new']}\n"
+                f"{SEPARATOR}\n"
+                for item in logs))
 
 
 # ==========================================
@@ -182,8 +227,10 @@ def run_bundle_merge(old_file, new_file, out_file, report_file):
 
     try:
         df_old = pd.read_excel(old_file, sheet_name="Patch addresses", dtype={'PathID': str})
-        df_new = pd.read_excel(new_file, sheet_name="Patch addresses", dtype={'PathID': str})
-        df_info_new = pd.read_excel(new_file, sheet_name="Bundle Info", dtype=str)
+        # Mở file mới một lần cho cả hai sheet (không parse lại file zip)
+        with pd.ExcelFile(new_file, engine='openpyxl') as xls_new:
+            df_new = pd.read_excel(xls_new, sheet_name="Patch addresses", dtype={'PathID': str})
+            df_info_new = pd.read_excel(xls_new, sheet_name="Bundle Info", dtype=str)
     except Exception as e:
         print(f"    [!] Lỗi đọc file: {e}")
         return
@@ -196,70 +243,60 @@ def run_bundle_merge(old_file, new_file, out_file, report_file):
     df_new['Translated'] = df_new['Translated'].astype(object)
     df_new['Notes'] = df_new['Notes'].astype(object)
 
-    # Indexing
-    context_map = {}
-    id_map = {}
-    for index, row in df_old.iterrows():
-        suffix = str(row.get('Bundle path suffix', '')).strip()
-        path_id = str(row.get('PathID', '')).strip()
-        selector = str(row.get('Object selector', '')).strip()
-        original = str(row.get('Original', '')).strip()
-        raw_notes = str(row.get('Notes', ''))
-        clean_notes = clean_note_content(raw_notes)
-        trans = row.get('Translated', '')
-
-        if pd.notna(trans) and str(trans).lower() != 'nan' and str(trans).strip() != '':
-            key_ctx = (suffix, original, clean_notes)
-            context_map[key_ctx] = trans
-            key_id = (suffix, path_id, selector)
-            id_map[key_id] = {'trans': trans, 'orig_old': original}
-
-    # Merging
-    logs = []
-    for index, row in df_new.iterrows():
-        suffix = str(row.get('Bundle path suffix', '')).strip()
-        path_id = str(row.get('PathID', '')).strip()
-        selector = str(row.get('Object selector', '')).strip()
-        orig_new = str(row.get('Original', '')).strip()
-        notes_new = str(row.get('Notes', '')).strip()
-
-        key_ctx = (suffix, orig_new, notes_new)
-        key_id = (suffix, path_id, selector)
-
-        found_trans = None
-        status = ""
-        orig_old_log = None
-
-        if key_ctx in context_map:
-            found_trans = context_map[key_ctx]
-            status = "PERFECT_MATCH"
-        elif key_id in id_map:
-            old_data = id_map[key_id]
-            found_trans = old_data['trans']
-            orig_old_log = old_data['orig_old']
-            status = "CONTENT_CHANGED"
-        else:
-            status = "NEW_UNMATCHED"
-
-        if found_trans:
-            df_new.at[index, 'Translated'] = found_trans
-
-        logs.append({
-            "status": status,
-            "path_id": path_id,
-            "bundle": suffix,
-            "original_new": orig_new,
-            "original_old": orig_old_log
-        })
+    # Indexing: khóa được tính theo cột (giống str(...).strip() từng dòng), không dùng iterrows
+    suffix_old = _str_column(df_old, 'Bundle path suffix')
+    path_id_old = _str_column(df_old, 'PathID')
+    selector_old = _str_column(df_old, 'Object selector')
+    original_old = _str_column(df_old, 'Original')
+    notes_old = clean_note_column(_str_column(df_old, 'Notes', strip=False))
+    trans_old = df_old['Translated'] if 'Translated' in df_old.columns else _blank_column(df_old)
+    trans_text = trans_old.map(str)
+    has_trans = (trans_old.notna() & (trans_text.str.lower() != 'nan') & (trans_text.str.strip() != '')).to_numpy()
+
+    context_map = _index_last(
+        [suffix_old[has_trans], original_old[has_trans], notes_old[has_trans]],
+        pd.DataFrame({'trans': trans_old[has_trans]}))
+    id_map = _index_last(
+        [suffix_old[has_trans], path_id_old[has_trans], selector_old[has_trans]],
+        pd.DataFrame({'trans': trans_old[has_trans], 'orig_old': original_old[has_trans]}))
+
+    # Merging: tra cả cột một lần thay vì từng dòng
+    suffix_new = _str_column(df_new, 'Bundle path suffix')
+    path_id_new = _str_column(df_new, 'PathID')
+    selector_new = _str_column(df_new, 'Object selector')
+    original_new = _str_column(df_new, 'Original')
+    notes_new = _str_column(df_new, 'Notes')
+
+    ctx_hit = context_map.reindex(pd.MultiIndex.from_arrays([suffix_new, original_new, notes_new]))
+    id_hit = id_map.reindex(pd.MultiIndex.from_arrays([suffix_new, path_id_new, selector_new]))
+    is_ctx = ctx_hit['trans'].notna().to_numpy()
+    is_id = ~is_ctx & id_hit['trans'].notna().to_numpy()
+
+    status = np.select([is_ctx, is_id], ["PERFECT_MATCH", "CONTENT_CHANGED"], default="NEW_UNMATCHED")
+    found_trans = np.where(is_ctx, ctx_hit['trans'].to_numpy(dtype=object), id_hit['trans'].to_numpy(dtype=object))
+    # Chỉ ghi bản dịch "truthy" (như `if found_trans:` trước đây)
+    fill = (is_ctx | is_id) & found_trans.astype(bool)
+    df_new.loc[fill, 'Translated'] = found_trans[fill]
+    orig_old_log = np.where(is_id, id_hit['orig_old'].to_numpy(dtype=object), None)
+
+    # Log dạng cột (mỗi trường một mảng) thay vì một dict cho mỗi dòng
+    logs = {
+        "status": status,
+        "path_id": path_id_new.to_numpy(dtype=object),
+        "bundle": suffix_new.to_numpy(dtype=object),
+        "original_new": original_new.to_numpy(dtype=object),
+        "original_old": orig_old_log,
+    }
 
     # Saving
     df_new = df_new[BUNDLE_PATCH_HEADER]
     with pd.ExcelWriter(out_file, engine='openpyxl') as writer:
         df_info_new.to_excel(writer, sheet_name="Bundle Info", index=False)
         df_new.to_excel(writer, sheet_name="Patch addresses", index=False)
+        # Style the workbook before ExcelWriter saves it, instead of reloading the saved file
+        format_bundle_excel(writer.book)
 
-    format_bundle_excel(out_file)
-    stats = pd.DataFrame(logs)['status'].value_counts().to_dict()
+    stats = dict(Counter(status.tolist()))
     stats['total'] = len(df_new)
     write_bundle_report(report_file, logs, stats)
     print(f"    [v] Hoàn tất! Output: {out_file}")
@@ -287,42 +324,39 @@ def merge_trans_sheet(sheet_name, df_old, df_new, diff_records):
     df_new = normalize_trans_columns(df_new)
 
     merged = pd.merge(df_old, df_new, on='ID', how='outer', suffixes=('_old', '_new'), indicator=True)
-    final_rows = []
-
-    for index, row in merged.iterrows():
-        row_id = row['ID']
-        merge_status = row['_merge']
-        new_row = {'ID': row_id}
-
-        orig_old = str(row['Original_old']) if pd.notna(row['Original_old']) else ""
-        orig_new = str(row['Original_new']) if pd.notna(row['Original_new']) else ""
-        chn_old = str(row['Chinese_old']) if pd.notna(row['Chinese_old']) else ""
-        chn_new = str(row['Chinese_new']) if pd.notna(row['Chinese_new']) else ""
-
-        if merge_status == 'left_only':
-            new_row['Original'] = orig_old
-            new_row['Chinese'] = chn_old
-        else:
-            new_row['Original'] = orig_new
-            new_row['Chinese'] = chn_new
-            if merge_status == 'both':
-                if orig_old != orig_new:
-                    diff_records.append(
-                        {"sheet": sheet_name, "id": row_id, "field": "Original", "old": orig_old, "new": orig_new})
-                if chn_old != chn_new:
-                    diff_records.append(
-                        {"sheet": sheet_name, "id": row_id, "field": "Chinese", "old": chn_old, "new": chn_new})
-
-        for col in ["MTL", "Edited", "QA 1", "QA 2", "QA 3"]:
-            val_old = row[f'{col}_old']
-            val_new = row[f'{col}_new']
-            if merge_status == 'right_only':
-                new_row[col] = val_new if pd.notna(val_new) else ""
-            else:
-                new_row[col] = val_old if pd.notna(val_old) else ""
-
-        final_rows.append(new_row)
-    return pd.DataFrame(final_rows, columns=TRANS_COMMON_HEADER)
+    merge_status = merged['_merge'].to_numpy(dtype=object)
+    left_only = merge_status == 'left_only'
+    right_only = merge_status == 'right_only'
+    both = merge_status == 'both'
+    row_ids = merged['ID'].to_numpy(dtype=object)
+
+    # Ghép theo cột (np.where theo trạng thái merge) thay vì iterrows
+    orig_old = _text_or_blank(merged['Original_old'])
+    orig_new = _text_or_blank(merged['Original_new'])
+    chn_old = _text_or_blank(merged['Chinese_old'])
+    chn_new = _text_or_blank(merged['Chinese_new'])
+    final_columns = {
+        'ID': row_ids,
+        'Original': np.where(left_only, orig_old, orig_new),
+        'Chinese': np.where(left_only, chn_old, chn_new),
+    }
+
+    orig_changed = both & (orig_old != orig_new)
+    chn_changed = both & (chn_old != chn_new)
+    for i in np.flatnonzero(orig_changed | chn_changed):
+        if orig_changed[i]:
+            diff_records.append(
+                {"sheet": sheet_name, "id": row_ids[i], "field": "Original", "old": orig_old[i], "new": orig_new[i]})
+        if chn_changed[i]:
+            diff_records.append(
+                {"sheet": sheet_name, "id": row_ids[i], "field": "Chinese", "old": chn_old[i], "new": chn_new[i]})
+
+    for col in ["MTL", "Edited", "QA 1", "QA 2", "QA 3"]:
+        picked = np.where(right_only, merged[f'{col}_new'].to_numpy(dtype=object),
+                          merged[f'{col}_old'].to_numpy(dtype=object))
+        final_columns[col] = np.where(pd.isna(picked), "", picked)
+
+    return pd.DataFrame(final_columns, columns=TRANS_COMMON_HEADER)
 
 
 def run_translate_merge(old_file, new_file, out_file, report_file):
@@ -367,7 +401,8 @@ def run_translate_merge(old_file, new_file, out_file, report_file):
             final_df = merge_trans_sheet(sheet_name, df_old, df_new, diff_records)
             final_df.to_excel(writer, sheet_name=sheet_name, index=False)
 
-    format_translate_excel(out_file)
+        format_translate_excel(writer.book)
+
     write_translate_report(report_file, diff_records)
     print(f"    [v] Hoàn tất! Output: {out_file}")
 
@@ -376,6 +411,21 @@ def run_translate_merge(old_file, new_file, out_file, report_file):
 # MAIN
 # ==========================================
 
+def _run_captured(func, *args):
+    """Chạy func(*args) trong process con, giữ lại toàn bộ output để main in ra theo thứ tự
+    thay vì để 2 module in xen kẽ nhau. Trả về (output, lỗi hay không).
+    """
+    log = StringIO()
+    failed = False
+    with redirect_stdout(log):
+        try:
+            func(*args)
+        except Exception:
+            print(traceback.format_exc(), end="")
+            failed = True
+    return log.getvalue(), failed
+
+
 def main():
     parser = argparse.ArgumentParser(description="Universal Auto Merge Tool")
 
@@ -396,8 +446,20 @@ def main():
     # Tự động chạy cả 2 nếu file tồn tại
     print("=== UNIVERSAL MERGE TOOL STARTING ===")
 
-    run_bundle_merge(args.bundle_old, args.bundle_new, args.bundle_out, args.bundle_report)
-    run_translate_merge(args.trans_old, args.trans_new, args.trans_out, args.trans_report)
+    # Hai module dùng các file riêng biệt nên chạy song song ở 2 process;
+    # output của mỗi module được in ra trọn vẹn, theo thứ tự [1/2] rồi [2/2]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(_run_captured, run_bundle_merge,
+                            args.bundle_old, args.bundle_new, args.bundle_out, args.bundle_report),
+            executor.submit(_run_captured, run_translate_merge,
+                            args.trans_old, args.trans_new, args.trans_out, args.trans_report),
+        ]
+        for future in futures:
+            output, failed = future.result()
+            print(output, end="")
+            if failed:
+                raise SystemExit(1)
 
     print("\n=== ALL TASKS FINISHED ===")
 
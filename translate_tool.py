@@ -3,9 +3,14 @@ import re
 import shutil
 import sys
 import traceback
+from contextlib import redirect_stdout
+from io import StringIO
+from itertools import repeat
+from multiprocessing import freeze_support
 from typing import List, Tuple, Optional
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from PIL import Image
 from UnityPy.classes import Texture2D
@@ -18,14 +23,21 @@ from openpyxl.utils import get_column_letter
 import UnityPy
 import yaml
 
+# Prefer the libyaml-backed loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlSafeLoader, CSafeDumper as YamlSafeDumper
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader, SafeDumper as YamlSafeDumper
+
 from lib.bin import validate_bin_patch_map
 from lib.steam import get_steam_game_path
 from lib.tree_traversal import set_by_selector
 from lib.utils import is_file_editable, is_running_in_exe
 from lib.text import is_alnum_start, trim_blank_lines
-from lib.sheet import sanitize_sheet_name, apply_header_and_column_widths, apply_wrap_to_all_cells
+from lib.sheet import sanitize_sheet_name, apply_header_and_column_widths, wrapped_cells, WRAP_ALIGN
 
 IGNORED_BUNDLE_SUFFIXES = ['general-managedtext_assets_all.bundle']
+_IGNORED_SUFFIX_TUPLE = tuple(IGNORED_BUNDLE_SUFFIXES)
 
 ROOT = sys._MEIPASS if is_running_in_exe() else os.path.dirname(os.path.abspath(__file__))
 ORIGINAL_DIR = os.path.join(ROOT, "original")
@@ -50,6 +62,19 @@ OVERVIEW_HEADER = ["Act", "Chapter", "File", "Total Lines", "MTL %", "Edited %"]
 SUMMARIES_HEADER = ["Sheet name", "Summary"]
 PATCH_HEADER = ["Bundle path suffix", "PathID", "Object selector", "Original", "Translated", "Notes"]
 
+# Column widths, by position, for the sheets above
+COMMON_TRANSLATE_WIDTHS = (32, 60, 60, 60, 60, 14, 14, 14)
+METADATA_WIDTHS = (32, 60, 12)
+KNOWLEDGE_WIDTHS = (100,)
+OVERVIEW_WIDTHS = (20, 20, 40, 20, 20, 20)
+SUMMARIES_WIDTHS = (32, 100)
+PATCH_WIDTHS = (50, 16, 60, 60, 60, 60)
+
+# Line patterns, compiled once
+_TYPE2_LINE_RE = re.compile(r"^\s*([^:]+):\s*(.*)$")
+_CHAPTER_SHEET_RE = re.compile(r"^(Act\d+)_Chapter(\d+)_(.+)$")
+_NUMBERED_LINE_RE = re.compile(r'^(\d+)\.\s*(.*)$')
+
 INITIAL_PROJECT_HEADER = [
     "Project type: Visual Novel translation.",
     "Goal: Produce high‑quality, natural translations suitable for a visual novel UI/dialogue.",
@@ -62,8 +87,7 @@ def ensure_patch_sheet(wb):
         ws = wb.create_sheet(title=PATCH_SHEETNAME)
         ws.append(PATCH_HEADER)
         # Style, freeze, and set column widths via common helper
-        apply_header_and_column_widths(ws, PATCH_HEADER, [50, 16, 60, 60, 60, 60])
-        apply_wrap_to_all_cells(ws)
+        apply_header_and_column_widths(ws, PATCH_HEADER, PATCH_WIDTHS)
     else:
         ws = wb[PATCH_SHEETNAME]
     # Enforce PathID column (B) as plain text
@@ -98,7 +122,7 @@ def load_patches_from_files() -> dict:
             with open(ADDRESSES_PATH, 'r', encoding='utf-8') as f:
                 content = f.read().strip()
                 if content:
-                    data = yaml.safe_load(content) or {}
+                    data = yaml.load(content, Loader=YamlSafeLoader) or {}
                     # normalize into merged
                     if isinstance(data, dict):
                         for suf, id_map in data.items():
@@ -125,43 +149,51 @@ def load_patches_from_files() -> dict:
         if not os.path.exists(xlsx_path):
             return
         try:
-            wb = load_workbook(xlsx_path)
+            # Only one sheet is scanned row by row, so stream it instead of loading the whole workbook
+            wb = load_workbook(xlsx_path, read_only=True, data_only=True)
         except Exception:
             return
-        # Find a sheet whose name matches 'Patch addresses' (case-insensitive, with or without capital A)
-        target_ws = None
-        for s in wb.sheetnames:
-            if s.lower().strip() in { 'patch addresses' }:
-                target_ws = wb[s]
-                break
-        if target_ws is None:
-            return
-        # Map headers
-        headers = [ (target_ws.cell(row=1, column=c).value or '').strip() for c in range(1, target_ws.max_column + 1) ]
-        name_to_idx = { (h or '').strip().lower(): i+1 for i, h in enumerate(headers) }
-        needed = ['bundle path suffix', 'pathid', 'object selector']
-        if not all(col in name_to_idx for col in needed):
-            return
-        col_suffix = name_to_idx['bundle path suffix']
-        col_pathid = name_to_idx['pathid']
-        col_selector = name_to_idx['object selector']
-        col_original = name_to_idx.get('original')
-        col_translated = name_to_idx.get('translated')
-        max_row = target_ws.max_row or 1
-        for r in range(2, max_row + 1):
-            suf = (target_ws.cell(row=r, column=col_suffix).value or '').strip()
-            pid = str((target_ws.cell(row=r, column=col_pathid).value or '').strip())
-            selector = (target_ws.cell(row=r, column=col_selector).value or '').strip()
-            if not suf or not pid or not selector:
-                continue
-            val_t = (target_ws.cell(row=r, column=col_translated).value if col_translated else None)
-            val_o = (target_ws.cell(row=r, column=col_original).value if col_original else None)
-            val_t = (str(val_t) if val_t is not None else '').strip()
-            val_o = (str(val_o) if val_o is not None else '').strip()
-            value = val_t if val_t != '' else val_o
-            if value == '':
-                continue
-            _merge_entry(merged, suf, pid, selector, value)
+        try:
+            # Find a sheet whose name matches 'Patch addresses' (case-insensitive, with or without capital A)
+            target_ws = None
+            for s in wb.sheetnames:
+                if s.lower().strip() in { 'patch addresses' }:
+                    target_ws = wb[s]
+                    break
+            if target_ws is None:
+                return
+            rows = target_ws.iter_rows(values_only=True)
+            # Map headers
+            headers = [ (h or '').strip() for h in next(rows, ()) ]
+            name_to_idx = { (h or '').strip().lower(): i for i, h in enumerate(headers) }
+            needed = ['bundle path suffix', 'pathid', 'object selector']
+            if not all(col in name_to_idx for col in needed):
+                return
+            col_suffix = name_to_idx['bundle path suffix']
+            col_pathid = name_to_idx['pathid']
+            col_selector = name_to_idx['object selector']
+            col_original = name_to_idx.get('original')
+            col_translated = name_to_idx.get('translated')
+            width = max(c for c in (col_suffix, col_pathid, col_selector, col_original, col_translated)
+                        if c is not None) + 1
+            for row in rows:
+                if len(row) < width:
+                    row = row + (None,) * (width - len(row))
+                suf = (row[col_suffix] or '').strip()
+                pid = str((row[col_pathid] or '').strip())
+                selector = (row[col_selector] or '').strip()
+                if not suf or not pid or not selector:
+                    continue
+                val_t = (row[col_translated] if col_translated is not None else None)
+                val_o = (row[col_original] if col_original is not None else None)
+                val_t = (str(val_t) if val_t is not None else '').strip()
+                val_o = (str(val_o) if val_o is not None else '').strip()
+                value = val_t if val_t != '' else val_o
+                if value == '':
+                    continue
+                _merge_entry(merged, suf, pid, selector, value)
+        finally:
+            wb.close()
 
     # 2) translate.xlsx
     _gather_from_workbook(XLSX_PATH)
@@ -191,7 +223,7 @@ def populate_patch_sheet_from_file(wb, update_instead_of_overwrite: bool = True)
                 for ent in entries:
                     selector = ent.get('object_selector', '')
                     val = ent.get('patched_value', '')
-                    ws.append([bundle_suffix, pid_str, selector, val, "", ""])  # Original=val, Translated empty; Notes empty
+                    ws.append(wrapped_cells(ws, [bundle_suffix, pid_str, selector, val, "", ""]))  # Original=val, Translated empty; Notes empty
     else:
         # Sheet has existing rows and only_if_empty=True -> merge: add missing and fill blanks
         # Build index of existing rows: key -> row number
@@ -223,7 +255,7 @@ def populate_patch_sheet_from_file(wb, update_instead_of_overwrite: bool = True)
                         key = (bundle_suffix, pid_str, selector)
                         r = index.get(key)
                         if r is None:
-                            ws.append([bundle_suffix, pid_str, selector, val, ""])  # New line
+                            ws.append(wrapped_cells(ws, [bundle_suffix, pid_str, selector, val, ""]))  # New line
                         else:
                             # Update cells if empty
                             orig_cell = ws.cell(row=r, column=col_original)
@@ -232,22 +264,23 @@ def populate_patch_sheet_from_file(wb, update_instead_of_overwrite: bool = True)
                                 orig_cell.value = val
                             if (trans_cell.value is None) or (str(trans_cell.value).strip() == ""):
                                 trans_cell.value = val
-    apply_wrap_to_all_cells(ws) 
     # Enforce PathID text format after population/merge
     enforce_patch_pathid_text(ws)
 
-def dump_patches_from_files() -> None:
+def dump_patches_from_files() -> dict:
     """Dump merged patches from all sources into patches/addresses.txt.
     Uses load_patches_from_files to aggregate from YAML + translate.xlsx + bundle_info.xlsx.
+    Returns the merged patches so callers can reuse them without re-reading the sources.
     """
     merged = load_patches_from_files() or {}
     os.makedirs(PATCHES_DIR, exist_ok=True)
     try:
         with open(ADDRESSES_PATH, 'w', encoding='utf-8') as f:
-            yaml.safe_dump(merged, f, allow_unicode=True, sort_keys=True)
+            yaml.dump(merged, f, Dumper=YamlSafeDumper, allow_unicode=True, sort_keys=True)
         print(f"Wrote merged patches to {ADDRESSES_PATH} ({sum(len(v) for v in merged.values())} path groups)")
     except Exception as e:
         print(f"Error writing {ADDRESSES_PATH}: {e}")
+    return merged
 
 def enforce_patch_pathid_text(ws):
     """Ensure PathID column (B) is plain text in Excel and values are stored as strings."""
@@ -282,7 +315,7 @@ def parse_type2(lines: List[str]) -> List[Tuple[str, str, str]]:
                 comment = comment[1:]
             last_comment_block.append(comment)
             continue
-        m = re.match(r"^\s*([^:]+):\s*(.*)$", line)
+        m = _TYPE2_LINE_RE.match(line)
         if m:
             _id = m.group(1).strip()
             localized = m.group(2)
@@ -366,8 +399,7 @@ def update_overview(wb):
         ov_ws = wb.create_sheet(title=OVERVIEW_SHEETNAME, index=0)
         header = OVERVIEW_HEADER
         ov_ws.append(header)
-        apply_header_and_column_widths(ov_ws, header, [20, 20, 40, 20, 20, 20])
-        apply_wrap_to_all_cells(ov_ws)
+        apply_header_and_column_widths(ov_ws, header, OVERVIEW_WIDTHS)
     else:
         ov_ws = wb[OVERVIEW_SHEETNAME]
         for row in range(ov_ws.max_row, 1, -1):
@@ -379,7 +411,7 @@ def update_overview(wb):
         if sheet_name.lower().startswith('common'):
             structure['Common']['Common'].append(sheet_name)
         else:
-            match = re.match(r"^(Act\d+)_Chapter(\d+)_(.+)$", sheet_name)
+            match = _CHAPTER_SHEET_RE.match(sheet_name)
             if not match:
                 continue
             act, chapter, file_type = match.groups()
@@ -559,8 +591,10 @@ def _load_and_parse_original_txt(path: str):
     Returns (None, None) if type cannot be detected.
     """
     try:
+        # One read + split instead of a str object per readlines() step; newlines are
+        # already normalized to '\n' by text mode, and the parsers skip the trailing empty line
         with open(path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+            lines = f.read().split('\n')
     except UnicodeDecodeError:
         print(f"File {path} cannot be decoded.")
         return None, None
@@ -616,10 +650,10 @@ def _add_sheet_with_parsed_data(wb, base_sheet_name: str, data: List[Tuple[str,
         sheet_name = sanitize_sheet_name(f"{sheet_name}_{suffix}")
     ws = wb.create_sheet(title=sheet_name)
     ws.append(COMMON_TRANSLATE_HEADER)
-    apply_header_and_column_widths(ws, COMMON_TRANSLATE_HEADER, [32, 60, 60, 60, 60, 14, 14, 14])
+    apply_header_and_column_widths(ws, COMMON_TRANSLATE_HEADER, COMMON_TRANSLATE_WIDTHS)
     for _id, original, localized in data:
-        ws.append([_id, original, trim_blank_lines(localized), "", "", "", "", ""])
-    apply_wrap_to_all_cells(ws)
+        # original/localized come from parse_type1/parse_type2, already trimmed
+        ws.append(wrapped_cells(ws, [_id, original, localized, "", "", "", "", ""]))
     _apply_qa_conditional_formatting(ws)
     return sheet_name
 
@@ -649,26 +683,22 @@ def parse_original_files() -> None:
 
     meta_ws = wb.create_sheet(title=METADATA_SHEETNAME)
     meta_ws.append(METADATA_HEADER)
-    apply_header_and_column_widths(meta_ws, METADATA_HEADER, [32, 60, 12])
+    apply_header_and_column_widths(meta_ws, METADATA_HEADER, METADATA_WIDTHS)
 
     for row in metadata_rows:
-        meta_ws.append(row)
-
-    apply_wrap_to_all_cells(meta_ws)
+        meta_ws.append(wrapped_cells(meta_ws, row))
 
     kb_ws = wb.create_sheet(title=KNOWLEDGE_SHEETNAME)
     kb_ws.append(KNOWLEDGE_HEADER)
-    apply_header_and_column_widths(kb_ws, KNOWLEDGE_HEADER, [100])
+    apply_header_and_column_widths(kb_ws, KNOWLEDGE_HEADER, KNOWLEDGE_WIDTHS)
     for line in INITIAL_PROJECT_HEADER:
-        kb_ws.append([line])
-    apply_wrap_to_all_cells(kb_ws)
+        kb_ws.append(wrapped_cells(kb_ws, [line]))
 
     sum_ws = wb.create_sheet(title=SUMMARIES_SHEETNAME)
     _sum_headers = SUMMARIES_HEADER
     sum_ws.append(_sum_headers)
     # Keep Summaries unfrozen as before
-    apply_header_and_column_widths(sum_ws, _sum_headers, [32, 100])
-    apply_wrap_to_all_cells(sum_ws)
+    apply_header_and_column_widths(sum_ws, _sum_headers, SUMMARIES_WIDTHS)
 
     # Create Patch addresses sheet and populate from existing file if available
     ensure_patch_sheet(wb)
@@ -691,7 +721,8 @@ def get_knowledge_text(wb) -> str:
         return "\n\n".join(parts).strip()
     return "\n\n".join(INITIAL_PROJECT_HEADER)
 
-def generate_file_summary(client, sheet_name: str, rows: List[Tuple[str, str, str]]) -> str:
+def generate_file_summary(client, sheet_name: str, rows: List[Tuple[str, str, str]],
+                          knowledge_text: Optional[str] = None) -> str:
     context = "\n\n".join(
         f"ID: {row[0]}\nOriginal: {row[1] or '<empty>'}\nChinese: {row[2] or '<empty>'}"
         for row in rows
@@ -700,7 +731,8 @@ def generate_file_summary(client, sheet_name: str, rows: List[Tuple[str, str, st
         "You are a translator for a visual novel. Summarize the content of the following file in 2-3 concise lines, "
         "specifying the main context, key characters, and primary events. The summary must guide the tone and style of the translation "
         "(e.g., somber, emotional). Do not translate individual lines, only provide the summary in Vietnamese.\n\n"
-        "Knowledge base (user-provided notes):\n" + get_knowledge_text(load_workbook(XLSX_PATH))
+        "Knowledge base (user-provided notes):\n"
+        + (knowledge_text if knowledge_text is not None else get_knowledge_text(load_workbook(XLSX_PATH)))
     )
     user_prompt = f"Sheet: {sheet_name}\n\nContent:\n{context}\n\nSummarize in 2-3 lines in Vietnamese."
     try:
@@ -717,6 +749,78 @@ def generate_file_summary(client, sheet_name: str, rows: List[Tuple[str, str, st
         print(f"Error generating summary for {sheet_name}: {e}")
         return ""
 
+def _request_sheet_translations(client, model: str, sheet_name: str, rows_to_translate: List[Tuple[str, str, str]],
+                                knowledge_text: str, summary: str) -> Tuple[str, List[Tuple[int, str]]]:
+    """Call the API for one sheet: generate its summary if missing, then translate its rows.
+    Runs in a worker thread, so it never touches the workbook.
+    Return (newly generated summary or "", list of (line number, translation)).
+    """
+    new_summary = ""
+    # Tạo tóm tắt nếu cần
+    if not summary:
+        summary = new_summary = generate_file_summary(client, sheet_name, rows_to_translate, knowledge_text)
+
+    # Tạo prompt duy nhất cho toàn bộ sheet
+    prompt_lines = []
+    for idx, (row_id, original, chinese) in enumerate(rows_to_translate, 1):
+        prompt_lines.append(
+            f"Line {idx}:\n"
+            f"ID: {row_id}\n"
+            f"Original value (source 1): {original or '<empty>'}\n"
+            f"Chinese value (source 2): {chinese or '<empty>'}\n"
+        )
+    content = "\n".join(prompt_lines)
+    sys_prompt = (
+        f"Knowledge base (user-provided notes):\n{knowledge_text or '<empty>'}\n\n"
+        f"File summary:\n{summary or '<no summary>'}\n\n"
+        "You are a translator for a visual novel. Translate the following lines into Vietnamese. "
+        "Return the translations in a numbered list corresponding to each line's index. "
+        "Preserve placeholders, variables, control codes, line breaks, speaker tone, honorifics where appropriate, and context. "
+        "Do not provide explanations, only the translations in the format:\n"
+        "1. <translation>\n2. <translation>\n..."
+    )
+    user_prompt = f"Sheet: {sheet_name}\n\nContent:\n{content}\n\nTranslate into Vietnamese as a numbered list."
+
+    translations = []
+    try:
+        resp = client.responses.create(
+            model=model,
+            reasoning=Reasoning(effort="medium"),
+            instructions=sys_prompt,
+            input=user_prompt
+        )
+        # print(f"Translate Input: ")
+        # print(sys_prompt + "\n" + user_prompt)
+        ai_text = (resp.output_text or "").strip()
+        if not ai_text:
+            print(f"Warning: Empty response for {sheet_name}")
+            return new_summary, translations
+
+        # print(ai_text)
+
+        # Phân tích phản hồi thành danh sách các bản dịch
+        current_translation = []
+        current_num = None
+        for line in ai_text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            match = _NUMBERED_LINE_RE.match(line)
+            if match:
+                if current_translation and current_num is not None:
+                    translations.append((current_num, '\n'.join(current_translation).strip()))
+                current_num = int(match.group(1))
+                current_translation = [match.group(2).strip()]
+            else:
+                if current_num is not None:
+                    current_translation.append(line)
+        if current_translation and current_num is not None:
+            translations.append((current_num, '\n'.join(current_translation).strip()))
+
+    except Exception as e:
+        print(f"OpenAI API error on {sheet_name}: {e}")
+    return new_summary, translations
+
 def translate_ai(num_lines: int) -> None:
     if not is_file_editable(XLSX_PATH):
         print(f"Excel sheet {XLSX_PATH} is not editable. Skipping.")
@@ -740,11 +844,14 @@ def translate_ai(num_lines: int) -> None:
 
     sum_ws = wb[SUMMARIES_SHEETNAME] if SUMMARIES_SHEETNAME in wb.sheetnames else None
 
+    # (sheet_name, ws, col_mtl, rows_to_translate, row_indices, summary) cho mỗi sheet cần dịch
+    jobs = []
     for sheet_name in wb.sheetnames:
         if sheet_name in SPECIAL_SHEETS:
             continue
         ws = wb[sheet_name]
-        headers = [(ws.cell(row=1, column=c).value or "").strip() for c in range(1, 10)]
+        header_row = next(ws.iter_rows(min_row=1, max_row=1, max_col=9, values_only=True))
+        headers = [(v or "").strip() for v in header_row]
         try:
             col_id = headers.index("ID") + 1
             col_orig = headers.index("Original") + 1
@@ -758,17 +865,18 @@ def translate_ai(num_lines: int) -> None:
         # Thu thập các dòng cần dịch
         rows_to_translate = []
         row_indices = []
-        for r in range(2, ws.max_row + 1):
+        max_col = max(col_id, col_orig, col_chinese, col_mtl)
+        for r, row in enumerate(ws.iter_rows(min_row=2, max_col=max_col, values_only=True), start=2):
             if processed >= num_lines:
                 break
-            row_id = (ws.cell(row=r, column=col_id).value or "").strip()
+            row_id = (row[col_id - 1] or "").strip()
             if not row_id:
                 continue
-            mtl_val = (ws.cell(row=r, column=col_mtl).value or "").strip()
+            mtl_val = (row[col_mtl - 1] or "").strip()
             if mtl_val:
                 continue
-            original = ws.cell(row=r, column=col_orig).value or ""
-            chinese = ws.cell(row=r, column=col_chinese).value or ""
+            original = row[col_orig - 1] or ""
+            chinese = row[col_chinese - 1] or ""
             if not original and not chinese:
                 continue
             rows_to_translate.append((row_id, original, chinese))
@@ -778,75 +886,30 @@ def translate_ai(num_lines: int) -> None:
         if not rows_to_translate:
             continue
 
-        # Tạo tóm tắt nếu cần
         summary = ""
         if sum_ws:
             for row in sum_ws.iter_rows(min_row=2, values_only=True):
                 if row and row[0] == sheet_name:
                     summary = row[1] or ""
                     break
-        if not summary:
-            summary = generate_file_summary(client, sheet_name, rows_to_translate)
-            if summary and sum_ws:
-                sum_ws.append([sheet_name, summary])
-                print(f"Summary for {sheet_name}: {summary}")
-
-        # Tạo prompt duy nhất cho toàn bộ sheet
-        prompt_lines = []
-        for idx, (row_id, original, chinese) in enumerate(rows_to_translate, 1):
-            prompt_lines.append(
-                f"Line {idx}:\n"
-                f"ID: {row_id}\n"
-                f"Original value (source 1): {original or '<empty>'}\n"
-                f"Chinese value (source 2): {chinese or '<empty>'}\n"
-            )
-        content = "\n".join(prompt_lines)
-        sys_prompt = (
-            f"Knowledge base (user-provided notes):\n{knowledge_text or '<empty>'}\n\n"
-            f"File summary:\n{summary or '<no summary>'}\n\n"
-            "You are a translator for a visual novel. Translate the following lines into Vietnamese. "
-            "Return the translations in a numbered list corresponding to each line's index. "
-            "Preserve placeholders, variables, control codes, line breaks, speaker tone, honorifics where appropriate, and context. "
-            "Do not provide explanations, only the translations in the format:\n"
-            "1. <translation>\n2. <translation>\n..."
-        )
-        user_prompt = f"Sheet: {sheet_name}\n\nContent:\n{content}\n\nTranslate into Vietnamese as a numbered list."
-
-        try:
-            resp = client.responses.create(
-                model=model,
-                reasoning=Reasoning(effort="medium"),
-                instructions=sys_prompt,
-                input=user_prompt
-            )
-            # print(f"Translate Input: ")
-            # print(sys_prompt + "\n" + user_prompt)
-            ai_text = (resp.output_text or "").strip()
-            if not ai_text:
-                print(f"Warning: Empty response for {sheet_name}")
-                continue
+        jobs.append((sheet_name, ws, col_mtl, rows_to_translate, row_indices, summary))
 
-            # print(ai_text)
+        if processed >= num_lines:
+            break
 
-            # Phân tích phản hồi thành danh sách các bản dịch
-            translations = []
-            current_translation = []
-            current_num = None
-            for line in ai_text.split('\n'):
-                line = line.strip()
-                if not line:
-                    continue
-                match = re.match(r'^(\d+)\.\s*(.*)$', line)
-                if match:
-                    if current_translation and current_num is not None:
-                        translations.append((current_num, '\n'.join(current_translation).strip()))
-                    current_num = int(match.group(1))
-                    current_translation = [match.group(2).strip()]
-                else:
-                    if current_num is not None:
-                        current_translation.append(line)
-            if current_translation and current_num is not None:
-                translations.append((current_num, '\n'.join(current_translation).strip()))
+    # Các request API chỉ chờ mạng nên chạy song song theo sheet; ghi vào workbook ở luồng chính, theo thứ tự sheet
+    max_workers = int(os.environ.get("OPENAI_CONCURRENCY", "8"))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [
+            executor.submit(_request_sheet_translations, client, model, sheet_name, rows_to_translate,
+                            knowledge_text, summary)
+            for sheet_name, _, _, rows_to_translate, _, summary in jobs
+        ]
+        for (sheet_name, ws, col_mtl, rows_to_translate, row_indices, _), future in zip(jobs, futures):
+            new_summary, translations = future.result()
+            if new_summary and sum_ws:
+                sum_ws.append([sheet_name, new_summary])
+                print(f"Summary for {sheet_name}: {new_summary}")
 
             # Gán bản dịch vào các ô tương ứng
             for num, translation in translations:
@@ -861,12 +924,6 @@ def translate_ai(num_lines: int) -> None:
                     ws.cell(row=row_idx, column=col_mtl).value = translation
                     print(f"Translated: {sheet_name} | ID {rows_to_translate[num - 1][0]}. Result: {translation}")
 
-        except Exception as e:
-            print(f"OpenAI API error on {sheet_name}: {e}")
-
-        if processed >= num_lines:
-            break
-
     if processed > 0 or (sum_ws and sum_ws.max_row > 1):
         update_overview(wb)
         wb.save(XLSX_PATH)
@@ -877,12 +934,20 @@ def translate_ai(num_lines: int) -> None:
 def _list_bundles(folder_path: str) -> List[Path]:
     """Return filtered list of bundle paths under folder_path, excluding ignored suffixes."""
     folder = Path(folder_path)
-    bundle_paths = list(folder.rglob("*.bundle"))
-    return [p for p in bundle_paths if not any(p.name.endswith(suf) for suf in IGNORED_BUNDLE_SUFFIXES)]
+    return [p for p in folder.rglob("*.bundle") if not p.name.endswith(_IGNORED_SUFFIX_TUPLE)]
+
+def _suffix_matches(path_str: str, suffix: str) -> bool:
+    """Whether a bundle path suffix (a path relative to some scanned folder) names this bundle.
+    The suffix must start at a path component, so 'data.bundle' doesn't match 'general-data.bundle'.
+    """
+    if not path_str.endswith(suffix):
+        return False
+    boundary = len(path_str) - len(suffix)
+    return boundary == 0 or path_str[boundary - 1] in ('/', '\\')
 
 def _asset_filename(obj) -> str|None:
     if not obj.container: return None
-    return obj.container.split('/')[-1]
+    return obj.container.rpartition('/')[2]
 
 def unpack_bundle(folder_path: str) -> None:
     bundle_paths = _list_bundles(folder_path)
@@ -909,12 +974,18 @@ def unpack_bundle(folder_path: str) -> None:
         except Exception as e:
             print(f"Error unpacking {bundle_path}: {e}")
 
+def _pick_used_value(chinese: str, mtl: str, edited: str) -> str:
+    """Edited, else MTL, else Chinese. The inputs already went through trim_blank_lines
+    and strip() keeps them trimmed, so the result needs no second pass."""
+    return edited.strip() or mtl.strip() or chinese
+
 def rebuild_translated_files() -> None:
     if not os.path.exists(XLSX_PATH):
         print(f"translate.xlsx not found at {XLSX_PATH}. Run parse first.")
         sys.exit(1)
 
-    wb = load_workbook(XLSX_PATH)
+    # Sheets are only read row by row, so stream them instead of loading every cell
+    wb = load_workbook(XLSX_PATH, read_only=True)
     if METADATA_SHEETNAME not in wb.sheetnames:
         print("Metadata sheet not found in translate.xlsx")
         sys.exit(1)
@@ -942,6 +1013,8 @@ def rebuild_translated_files() -> None:
         for row in ws.iter_rows(min_row=2, values_only=True):
             if not row:
                 continue
+            if len(row) < 5:
+                row = row + (None,) * (5 - len(row))
             _id = (row[0] or "").strip()
             if not _id:
                 continue
@@ -975,15 +1048,13 @@ def rebuild_translated_files() -> None:
 
         if ftype == 2:
             for _id, original, chinese, mtl, edited in id_rows:
-                used_value = edited.strip() if edited.strip() != "" else mtl.strip() if mtl.strip() != "" else chinese
-                used_value = trim_blank_lines(used_value)
+                used_value = _pick_used_value(chinese, mtl, edited)
                 add_comment_block(original, chinese, mtl, edited)
                 lines_out.append(f"{_id}: {used_value}")
                 lines_out.append("")
         elif ftype == 1:
             for _id, original, chinese, mtl, edited in id_rows:
-                used_value = edited.strip() if edited.strip() != "" else mtl.strip() if mtl.strip() != "" else chinese
-                used_value = trim_blank_lines(used_value)
+                used_value = _pick_used_value(chinese, mtl, edited)
                 lines_out.append(f"# {_id}")
                 add_comment_block(original, chinese, mtl, edited)
                 if used_value == "":
@@ -1000,6 +1071,8 @@ def rebuild_translated_files() -> None:
             f.write("\n".join(lines_out) + "\n")
         print(f"Wrote {out_path}")
 
+    wb.close()
+
 def patched_set_image(
     self: Texture2D,
     img: "Image.Image",
@@ -1026,49 +1099,28 @@ def patched_set_image(
         self.m_StreamData.offset = 0
         self.m_StreamData.size = 0
 
-def pack_translated_files(folder_path: str) -> None:
-    folder = Path(folder_path)
-    bundle_paths = _list_bundles(folder_path)
-
-    if not bundle_paths:
-        print(f"No .bundle files found in {folder_path}")
-        return
-
-    backup_folder = Path(folder_path + "_backup")
-    backup_folder.mkdir(parents=True, exist_ok=True)
-    print(f"Using backup folder: {backup_folder}")
+# Shared by the pack worker processes; set once per process by _init_pack_worker
+# instead of being pickled with every bundle
+_pack_translated_texts: dict = {}
+_pack_asset_files: dict = {}
 
-    print(f"Found {len(bundle_paths)} .bundle files:")
+def _init_pack_worker(translated_text_dict: dict, patched_asset_file_dict: dict) -> None:
+    global _pack_translated_texts, _pack_asset_files
+    _pack_translated_texts = translated_text_dict
+    _pack_asset_files = patched_asset_file_dict
 
-    translated_text_file_dict = {}
-    for file in Path(TRANSLATED_DIR).rglob("*.txt"):
-        translated_text_file_dict[file.name] = file
-
-    patched_asset_file_dict = {}
-    for ext in ["png", "jpg"]:
-        for file in Path(PATCHES_DIR).rglob(f"*.{ext}"):
-            patched_asset_file_dict[file.stem] = file
-
-    # Load patches once
-    patches = load_patches_from_files()
-    # Build a global set of all patch entries to track unpatched across bundles
-    all_patch_entries = set()
-    if patches:
-        for _suf, _id_map in patches.items():
-            for _pid, _entries in _id_map.items():
-                for _ent in _entries:
-                    _sel = _ent.get('object_selector')
-                    if _sel is not None:
-                        all_patch_entries.add((_suf, _pid, _sel))
-
-    for bundle_path in bundle_paths:
+def _pack_bundle(bundle_path: Path, rel_path: Path, applicable_patches: list, backup_folder: Path):
+    """Patch and save one bundle (see pack_translated_files). Runs in a worker process, so its
+    output is captured and returned for the caller to print, along with the patch entries applied.
+    Returns (log text, list of (suffix, path_id, selector)).
+    """
+    applied_entries = []
+    log = StringIO()
+    with redirect_stdout(log):
         try:
             bundle_path_str = str(bundle_path)
             bundle = UnityPy.load(bundle_path_str)
             bundle_modified = False
-
-            # Determine relevant patch keys (suffixes) for this bundle
-            applicable_suffixes = [suf for suf in patches.keys() if bundle_path_str.endswith(suf)] if patches else []
             patched_count = 0
 
             opened_objects_by_type = {"Texture2D": []}
@@ -1078,20 +1130,19 @@ def pack_translated_files(folder_path: str) -> None:
                     opened_objects_by_type["Texture2D"].append(obj.read())
 
             for obj in bundle.objects:
-                if obj.type.name == "TextAsset":
+                type_name = obj.type.name
+                if type_name == "TextAsset":
                     name = _asset_filename(obj)
-                    if name not in translated_text_file_dict:
+                    translated_text = _pack_translated_texts.get(name)
+                    if translated_text is None:
                         continue
 
-                    with open(translated_text_file_dict[name], 'r', encoding='utf-8') as f:
-                        translated_text = f.read()
-
                     data = obj.read()
                     data.m_Script = translated_text
                     data.save()
                     bundle_modified = True
                     print(f"    Replaced {name} in {bundle_path_str}")
-                elif obj.type.name == "SpriteAtlas":
+                elif type_name == "SpriteAtlas":
                     data = obj.read()
                     # Find Texture2D, whose name includes data.name
                     matching_texture = None
@@ -1103,8 +1154,8 @@ def pack_translated_files(folder_path: str) -> None:
                         continue
                     atlas_image = matching_texture.image # PIL
                     for idx, sprite_name in enumerate(data.m_PackedSpriteNamesToIndex):
-                        if sprite_name in patched_asset_file_dict:
-                            sprite_image = Image.open(patched_asset_file_dict[sprite_name])
+                        if sprite_name in _pack_asset_files:
+                            sprite_image = Image.open(_pack_asset_files[sprite_name])
                             coords = data.m_RenderDataMap[idx][1].textureRect
                             atlas_image.paste(sprite_image,
                                               (round(coords.x),
@@ -1119,11 +1170,11 @@ def pack_translated_files(folder_path: str) -> None:
                         # matching_texture.image = atlas_image
                         matching_texture.save()
 
-                elif obj.type.name == "Texture2D":
+                elif type_name == "Texture2D":
                     data = obj.read()
-                    if data.m_Name not in patched_asset_file_dict:
+                    if data.m_Name not in _pack_asset_files:
                         continue
-                    sprite_image = Image.open(patched_asset_file_dict[data.m_Name])
+                    sprite_image = Image.open(_pack_asset_files[data.m_Name])
                     # data.image = sprite_image
                     patched_set_image(data, sprite_image)
                     data.save()
@@ -1131,13 +1182,14 @@ def pack_translated_files(folder_path: str) -> None:
                     print(f"    Patched Texture2D {data.m_Name} in {bundle_path_str}")
                     patched_count += 1
 
-                elif obj.type.name == "MonoBehaviour" and applicable_suffixes:
+                elif type_name == "MonoBehaviour" and applicable_patches:
                     pid_key = str(obj.path_id)
-                    todo_entries = []  # list of (suffix, entry)
-                    for suf in applicable_suffixes:
-                        id_map = patches.get(suf, {})
-                        for _ent in id_map.get(pid_key, []):
-                            todo_entries.append((suf, _ent))
+                    todo_entries = []  # list of (suffix, selector, value)
+                    for suf, id_map in applicable_patches:
+                        for _ent in id_map.get(pid_key, ()):
+                            selector = _ent.get('object_selector')
+                            if selector is not None:
+                                todo_entries.append((suf, selector, _ent.get('patched_value')))
                     if not todo_entries:
                         continue
 
@@ -1148,16 +1200,12 @@ def pack_translated_files(folder_path: str) -> None:
                         continue
                     # Apply patches
                     any_patched_this_obj = False
-                    for suf, ent in todo_entries:
-                        selector = ent.get('object_selector')
-                        value = ent.get('patched_value')
-                        if selector is None:
-                            continue
+                    for suf, selector, value in todo_entries:
                         ok = set_by_selector(tree, selector, value)
                         if ok:
                             any_patched_this_obj = True
                             patched_count += 1
-                            all_patch_entries.discard((suf, pid_key, selector))
+                            applied_entries.append((suf, pid_key, selector))
 
                     if any_patched_this_obj:
                         try:
@@ -1167,10 +1215,6 @@ def pack_translated_files(folder_path: str) -> None:
                             print(f"Failed to save typetree for {bundle_path.name} pid {pid_key}: {e}")
 
             if bundle_modified:
-                try:
-                    rel_path = bundle_path.relative_to(folder)
-                except ValueError:
-                    rel_path = Path(bundle_path.name)
                 backup_path = backup_folder / rel_path
                 backup_path.parent.mkdir(parents=True, exist_ok=True)
                 if not backup_path.exists():
@@ -1184,6 +1228,70 @@ def pack_translated_files(folder_path: str) -> None:
 
         except Exception as e:
             print(f"Error processing {bundle_path}: {e} \n{traceback.print_stack()}")
+    return log.getvalue(), applied_entries
+
+def pack_translated_files(folder_path: str, patches: dict | None = None) -> None:
+    """Pack translated files, patched sprites/textures and patch addresses into the bundles.
+    patches: already merged patches (see dump_patches_from_files); loaded from files if None.
+    """
+    folder = Path(folder_path)
+    bundle_paths = _list_bundles(folder_path)
+
+    if not bundle_paths:
+        print(f"No .bundle files found in {folder_path}")
+        return
+
+    backup_folder = Path(folder_path + "_backup")
+    backup_folder.mkdir(parents=True, exist_ok=True)
+    print(f"Using backup folder: {backup_folder}")
+
+    print(f"Found {len(bundle_paths)} .bundle files:")
+
+    # Read each translated file once, even if several bundles contain the asset
+    translated_text_dict = {}
+    for file in Path(TRANSLATED_DIR).rglob("*.txt"):
+        with open(file, 'r', encoding='utf-8') as f:
+            translated_text_dict[file.name] = f.read()
+
+    patched_asset_file_dict = {}
+    for ext in ["png", "jpg"]:
+        for file in Path(PATCHES_DIR).rglob(f"*.{ext}"):
+            patched_asset_file_dict[file.stem] = file
+
+    # Load patches once
+    if patches is None:
+        patches = load_patches_from_files()
+    # Build a global set of all patch entries to track unpatched across bundles
+    all_patch_entries = set()
+    if patches:
+        for _suf, _id_map in patches.items():
+            for _pid, _entries in _id_map.items():
+                for _ent in _entries:
+                    _sel = _ent.get('object_selector')
+                    if _sel is not None:
+                        all_patch_entries.add((_suf, _pid, _sel))
+
+    # Bundles are independent and CPU-bound to load, patch and recompress, so they are packed in
+    # worker processes; their logs are printed here in bundle order
+    rel_paths = []
+    applicable_patches_list = []
+    for bundle_path in bundle_paths:
+        try:
+            rel_paths.append(bundle_path.relative_to(folder))
+        except ValueError:
+            rel_paths.append(Path(bundle_path.name))
+        # Determine relevant patch keys (suffixes) for this bundle, with their path_id maps
+        applicable_patches_list.append([(suf, id_map) for suf, id_map in patches.items()
+                                        if _suffix_matches(str(bundle_path), suf)] if patches else [])
+
+    max_workers = min(len(bundle_paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_pack_worker,
+                             initargs=(translated_text_dict, patched_asset_file_dict)) as executor:
+        results = executor.map(_pack_bundle, bundle_paths, rel_paths, applicable_patches_list,
+                               repeat(backup_folder))
+        for log_text, applied_entries in results:
+            print(log_text, end="")
+            all_patch_entries.difference_update(applied_entries)
 
     # Global report of unpatched patch entries across all bundles
     print(f"Unpatched entries across all bundles: {len(all_patch_entries)}")
@@ -1264,7 +1372,10 @@ def refresh():
             # Restyle header row (bold/gray) and freeze top row
             headers_now = [(ws.cell(row=1, column=c).value or "").strip() for c in range(1, ws.max_column + 1)]
             apply_header_and_column_widths(ws, headers_now)
-            apply_wrap_to_all_cells(ws)
+            # One-off pass for sheets from older files: wrap every data row, new QA cells included
+            for row in ws.iter_rows(min_row=2):
+                for cell in row:
+                    cell.alignment = WRAP_ALIGN
             _apply_qa_conditional_formatting(ws)
         else:
             # Even if QA present, ensure formatting exists
@@ -1506,8 +1617,8 @@ def main():
         pack_translated_files(sys.argv[2])
     elif cmd == 'build+pack' and len(sys.argv) >= 3:
         rebuild_translated_files()
-        dump_patches_from_files()
-        pack_translated_files(sys.argv[2])
+        patches = dump_patches_from_files()
+        pack_translated_files(sys.argv[2], patches)
     elif cmd == 'translate' and len(sys.argv) >= 3:
         try:
             n = int(sys.argv[2])
@@ -1529,4 +1640,6 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
+    # Lets the pack worker processes start from the PyInstaller executable
+    freeze_support()
     main()
\ No newline at end of file